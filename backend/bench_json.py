@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark: GET /api/status response serialization, via FastAPI's
+response_model path vs batch validation vs the trusted orjson path
+
+Usage: python bench_json.py [rows] [iterations]
+"""
+import asyncio
+import os
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import List
+
+os.environ.setdefault('MONGO_URL', 'mongodb://localhost:27017')
+os.environ.setdefault('DB_NAME', 'bench')
+
+import orjson
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field
+from pydantic import TypeAdapter
+
+from fast_json import FastJSONResponse, trusted_json
+from server import StatusCheck
+
+
+def make_docs(n):
+    start = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    return [
+        {'id': str(uuid.uuid4()), 'client_name': f'client-{i % 13}',
+         'timestamp': start + timedelta(seconds=i, microseconds=i * 7)}
+        for i in range(n)
+    ]
+
+
+async def response_model_path(field, docs):
+    """What FastAPI did for response_model=List[StatusCheck]"""
+    content = await serialize_response(field=field, response_content=docs)
+    return JSONResponse(content).body
+
+
+async def response_model_orjson_path(field, docs):
+    """Same, with only the response class swapped for FastJSONResponse"""
+    content = await serialize_response(field=field, response_content=docs)
+    return FastJSONResponse(content).body
+
+
+async def batch_validated_path(adapter, docs):
+    """One TypeAdapter pass validating and dumping the whole list"""
+    return adapter.dump_json(adapter.validate_python(docs))
+
+
+async def trusted_path(docs):
+    """What get_status_checks does now: documents projected to the model's fields"""
+    return trusted_json(docs).body
+
+
+async def measure(fn, iterations):
+    best = None
+    for _ in range(5):
+        started = time.perf_counter()
+        for _ in range(iterations):
+            await fn()
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best / iterations
+
+
+async def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    iterations = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+    docs = make_docs(rows)
+    field = create_response_field(name='Response_Get_Status_Checks', type_=List[StatusCheck])
+    adapter = TypeAdapter(List[StatusCheck])
+
+    expected = orjson.loads(await response_model_path(field, docs))
+    assert orjson.loads(await trusted_path(docs)) == expected
+    assert orjson.loads(await batch_validated_path(adapter, docs)) == expected
+
+    cases = [
+        ("response_model + JSONResponse", lambda: response_model_path(field, docs)),
+        ("response_model + FastJSONResponse", lambda: response_model_orjson_path(field, docs)),
+        ("TypeAdapter batch validation", lambda: batch_validated_path(adapter, docs)),
+        ("trusted_json", lambda: trusted_path(docs)),
+    ]
+    print(f"{iterations} responses x {rows} status checks")
+    baseline = None
+    for name, fn in cases:
+        per_response_ms = await measure(fn, iterations) * 1000
+        baseline = baseline or per_response_ms
+        print(f"{name:40s} {per_response_ms:8.3f} ms/response  {baseline / per_response_ms:6.2f}x")
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
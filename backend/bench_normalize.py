@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark: legacy per-field result mapping vs search_normalize
+
+Usage: python bench_normalize.py [records_per_page] [pages]
+"""
+import sys
+import timeit
+
+from search_normalize import normalize_page
+
+
+def legacy_transform(records):
+    """The mapping search_videos used before search_normalize"""
+    items = []
+    for video in records:
+        if video is None:
+            continue
+        channel_name = ''
+        if video.get('channel') and isinstance(video.get('channel'), dict):
+            channel_name = video['channel'].get('name', '') or ''
+        thumbnail_url = ''
+        thumbnails = video.get('thumbnails')
+        if thumbnails and isinstance(thumbnails, list) and len(thumbnails) > 0:
+            first_thumbnail = thumbnails[0]
+            if first_thumbnail and isinstance(first_thumbnail, dict):
+                thumbnail_url = first_thumbnail.get('url', '') or ''
+        description_text = ''
+        description_snippet = video.get('descriptionSnippet')
+        if description_snippet and isinstance(description_snippet, list) and len(description_snippet) > 0:
+            first_desc = description_snippet[0]
+            if first_desc and isinstance(first_desc, dict):
+                description_text = first_desc.get('text', '') or ''
+        items.append({
+            'id': video.get('id', '') or '',
+            'type': 'video',
+            'title': video.get('title', '') or '',
+            'channelTitle': channel_name,
+            'thumbnail': thumbnail_url,
+            'description': description_text
+        })
+    return items
+
+
+def make_records(n):
+    records = []
+    for i in range(n):
+        record = {
+            'type': 'video',
+            'id': f'vid{i:08d}',
+            'title': f'Video title number {i}',
+            'publishedTime': '3 days ago',
+            'duration': '12:34',
+            'viewCount': {'text': '1,234 views', 'short': '1.2K views'},
+            'thumbnails': [
+                {'url': f'https://i.ytimg.com/vi/vid{i:08d}/hqdefault.jpg?sqp=a', 'width': 360, 'height': 202},
+                {'url': f'https://i.ytimg.com/vi/vid{i:08d}/hq720.jpg?sqp=b', 'width': 720, 'height': 404},
+            ],
+            'descriptionSnippet': [{'text': 'A description snippet for the video'}],
+            'channel': {'name': f'Channel {i % 7}', 'id': f'UC{i % 7}'},
+            'link': f'https://www.youtube.com/watch?v=vid{i:08d}',
+        }
+        # Sprinkle in the malformed shapes the defensive code exists for
+        if i % 10 == 3:
+            record['channel'] = None
+        if i % 10 == 5:
+            record['descriptionSnippet'] = None
+        records.append(record)
+    records.insert(len(records) // 2, None)
+    return records
+
+
+def main():
+    per_page = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    pages = int(sys.argv[2]) if len(sys.argv) > 2 else 20000
+    records = make_records(per_page)
+    assert legacy_transform(records) == normalize_page(records)
+
+    cases = [
+        ("legacy", lambda: legacy_transform(records)),
+        ("normalize_page", lambda: normalize_page(records)),
+        ("normalize_page(thumbnail_width=480)", lambda: normalize_page(records, 480)),
+    ]
+    print(f"{pages} pages x {per_page} records")
+    baseline = None
+    for name, fn in cases:
+        best = min(timeit.repeat(fn, number=pages, repeat=5))
+        per_page_us = best / pages * 1e6
+        baseline = baseline or per_page_us
+        print(f"{name:40s} {per_page_us:8.2f} us/page  {baseline / per_page_us:5.2f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,145 @@
+"""
+Circuit breaker for calls to a flaky upstream
+"""
+import logging
+import math
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class CircuitOpenError(RuntimeError):
+    """Raised instead of calling upstream while the breaker is open"""
+
+    def __init__(self, name: str, retry_after: float):
+        super().__init__(f"{name} circuit open, retry in {math.ceil(retry_after)}s")
+        self.retry_after = retry_after
+
+
+class CircuitBreaker:
+    """
+    Closed: calls go through. After `failure_threshold` consecutive failures
+    the breaker opens; a call that succeeds but takes longer than
+    `slow_call_threshold` seconds counts as a failure too, so a brownout
+    trips it before every worker thread is stuck.
+
+    Open: calls fail immediately with CircuitOpenError for `reset_timeout`
+    seconds, then the breaker goes half-open.
+
+    Half-open: up to `half_open_max_calls` probe calls are let through at a
+    time. A successful probe closes the breaker, a failed one re-opens it.
+
+    Exceptions listed in `excluded` (e.g. local back-pressure) are passed
+    through without counting either way. Used from the event loop only, so
+    no locking.
+    """
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, name: str = 'upstream', failure_threshold: int = 5,
+                 slow_call_threshold: float = 10.0, reset_timeout: float = 30.0,
+                 half_open_max_calls: int = 1, excluded: tuple = ()):
+        self.name = name
+        self.excluded = excluded
+        self.failure_threshold = failure_threshold
+        self.slow_call_threshold = slow_call_threshold
+        self.reset_timeout = reset_timeout
+        self.half_open_max_calls = half_open_max_calls
+        self.state = self.CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self._probes = 0
+        self.calls = 0
+        self.failures = 0
+        self.slow_calls = 0
+        self.short_circuited = 0
+        self.times_opened = 0
+
+    def _before_call(self):
+        if self.state == self.OPEN:
+            waited = time.monotonic() - self.opened_at
+            if waited < self.reset_timeout:
+                self.short_circuited += 1
+                raise CircuitOpenError(self.name, self.reset_timeout - waited)
+            self.state = self.HALF_OPEN
+            logger.info(f"{self.name} circuit half-open, probing")
+        if self.state == self.HALF_OPEN:
+            if self._probes >= self.half_open_max_calls:
+                self.short_circuited += 1
+                raise CircuitOpenError(self.name, self.reset_timeout)
+            self._probes += 1
+        self.calls += 1
+
+    def _on_success(self, elapsed: float):
+        if elapsed > self.slow_call_threshold:
+            self.slow_calls += 1
+            self._on_failure()
+            return
+        self.consecutive_failures = 0
+        if self.state == self.HALF_OPEN:
+            self.state = self.CLOSED
+            logger.info(f"{self.name} circuit closed")
+
+    def _on_failure(self):
+        self.failures += 1
+        self.consecutive_failures += 1
+        if self.state == self.HALF_OPEN or (
+                self.state == self.CLOSED and self.consecutive_failures >= self.failure_threshold):
+            self.state = self.OPEN
+            self.opened_at = time.monotonic()
+            self.times_opened += 1
+            logger.warning(
+                f"{self.name} circuit opened after {self.consecutive_failures} consecutive failures"
+            )
+
+    def allow(self) -> bool:
+        """
+        Admit one call or raise CircuitOpenError. Returns whether the call
+        is a half-open probe; pass that to done() once the call is over,
+        whether or not it was ever run
+        """
+        self._before_call()
+        return self.state == self.HALF_OPEN
+
+    def done(self, probe: bool):
+        if probe:
+            self._probes -= 1
+
+    async def run(self, fn, *args, **kwargs):
+        """
+        Await fn(*args, **kwargs) for a call admitted by allow(), counting
+        its success or failure. Cancellation is neither
+        """
+        started = time.monotonic()
+        try:
+            result = await fn(*args, **kwargs)
+        except self.excluded:
+            raise
+        except Exception:
+            self._on_failure()
+            raise
+        self._on_success(time.monotonic() - started)
+        return result
+
+    async def call(self, fn, *args, **kwargs):
+        """
+        Await fn(*args, **kwargs) under the breaker
+        """
+        probe = self.allow()
+        try:
+            return await self.run(fn, *args, **kwargs)
+        finally:
+            self.done(probe)
+
+    def stats(self) -> dict:
+        return {
+            "state": self.state,
+            "consecutive_failures": self.consecutive_failures,
+            "calls": self.calls,
+            "failures": self.failures,
+            "slow_calls": self.slow_calls,
+            "short_circuited": self.short_circuited,
+            "times_opened": self.times_opened,
+        }
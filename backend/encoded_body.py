@@ -0,0 +1,93 @@
+"""
+Response bodies encoded and compressed once, served many times
+"""
+import gzip
+import hashlib
+from typing import Dict, Optional, Tuple
+
+import brotli
+
+# Bodies smaller than this are only kept uncompressed
+MIN_COMPRESS_SIZE = 512
+
+# Preferred first when the client accepts several
+ENCODINGS = ('br', 'gzip')
+
+
+def parse_accept_encoding(header: Optional[str]) -> Dict[str, float]:
+    """
+    {coding: q} from an Accept-Encoding header, e.g. 'gzip, br;q=0.5'
+    """
+    accepted = {}
+    for part in (header or '').split(','):
+        coding, _, params = part.strip().partition(';')
+        if not coding:
+            continue
+        q = 1.0
+        params = params.strip()
+        if params.startswith('q='):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        accepted[coding.strip().lower()] = q
+    return accepted
+
+
+class EncodedBody:
+    """
+    One response body with its gzip and brotli variants and a strong ETag
+    per variant (the same content compressed differently is a different
+    representation). Built when a result is cached, so cache hits only
+    pick the variant and write bytes.
+    """
+
+    __slots__ = ('identity', 'variants', 'etag', 'size')
+
+    def __init__(self, raw: bytes):
+        self.identity = raw
+        self.variants: Dict[str, bytes] = {}
+        if len(raw) >= MIN_COMPRESS_SIZE:
+            self.variants['gzip'] = gzip.compress(raw, compresslevel=9, mtime=0)
+            self.variants['br'] = brotli.compress(raw, quality=9)
+        self.etag = '"' + hashlib.sha256(raw).hexdigest()[:32] + '"'
+        self.size = len(raw) + sum(len(variant) for variant in self.variants.values())
+
+    def etag_for(self, encoding: Optional[str]) -> str:
+        return self.etag if encoding is None else f'{self.etag[:-1]}-{encoding}"'
+
+    def select(self, accept_encoding: Optional[str]) -> Tuple[bytes, Optional[str]]:
+        """
+        (body, content coding or None) best matching Accept-Encoding
+        """
+        accepted = parse_accept_encoding(accept_encoding)
+        wildcard = accepted.get('*', 0.0)
+        best = None
+        best_q = 0.0
+        for encoding in ENCODINGS:
+            if encoding not in self.variants:
+                continue
+            q = accepted.get(encoding, wildcard)
+            if q > best_q:
+                best, best_q = encoding, q
+        if best is None:
+            return self.identity, None
+        return self.variants[best], best
+
+    def matches(self, if_none_match: Optional[str]) -> bool:
+        """
+        Whether If-None-Match names any variant of this body (weak
+        comparison, as RFC 9110 requires for If-None-Match)
+        """
+        if not if_none_match:
+            return False
+        if if_none_match.strip() == '*':
+            return True
+        tags = {self.etag_for(None)} | {self.etag_for(encoding) for encoding in self.variants}
+        for tag in if_none_match.split(','):
+            tag = tag.strip()
+            if tag.startswith('W/'):
+                tag = tag[2:]
+            if tag in tags:
+                return True
+        return False
@@ -0,0 +1,256 @@
+"""
+In-process counters and histograms rendered in the Prometheus text
+exposition format
+"""
+import bisect
+import math
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from pymongo import monitoring
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+# Seconds: from cache hits well under a millisecond up to the search deadline
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+Labels = Tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in zip(names, values)) + '}'
+
+
+def _format_value(value: float) -> str:
+    if isinstance(value, float):
+        if math.isinf(value):
+            return '+Inf' if value > 0 else '-Inf'
+        if value.is_integer():
+            return str(int(value))
+    return repr(value)
+
+
+class _Metric:
+    """
+    Values are kept in one shard per recording thread, so recording never
+    takes a lock: the event loop and each executor or driver thread only
+    ever write their own shard, and a scrape sums them. Copying a shard
+    with list(shard.items()) is a single C call under the GIL, so a scrape
+    never sees a shard mid-resize.
+    """
+
+    kind = 'untyped'
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._local = threading.local()
+        self._shards: List[dict] = []
+
+    def _shard(self) -> dict:
+        try:
+            return self._local.shard
+        except AttributeError:
+            shard = self._local.shard = {}
+            self._shards.append(shard)
+            return shard
+
+    def samples(self) -> Iterable[Tuple[str, Labels, Sequence[str], float]]:
+        """
+        (name suffix, label values, extra (name, value) label pairs, value)
+        """
+        raise NotImplementedError
+
+    def render(self) -> List[str]:
+        lines = [f'# HELP {self.name} {_escape(self.help)}', f'# TYPE {self.name} {self.kind}']
+        for suffix, labels, extra, value in self.samples():
+            names = self.labelnames + tuple(name for name, _ in extra)
+            values = labels + tuple(value for _, value in extra)
+            lines.append(f'{self.name}{suffix}{_format_labels(names, values)} {_format_value(value)}')
+        return lines
+
+
+class Counter(_Metric):
+    kind = 'counter'
+
+    def inc(self, *labels: str, amount: float = 1):
+        shard = self._shard()
+        shard[labels] = shard.get(labels, 0) + amount
+
+    def samples(self):
+        totals: Dict[Labels, float] = {}
+        for shard in list(self._shards):
+            for labels, value in list(shard.items()):
+                totals[labels] = totals.get(labels, 0) + value
+        for labels in sorted(totals):
+            yield '', labels, (), totals[labels]
+
+
+class Histogram(_Metric):
+    """
+    Cumulative-bucket histogram; a shard holds, per label set, one count per
+    bucket (plus the +Inf overflow) followed by the sum
+    """
+
+    kind = 'histogram'
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, *labels: str):
+        shard = self._shard()
+        counts = shard.get(labels)
+        if counts is None:
+            counts = shard[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+        counts[bisect.bisect_left(self.buckets, value)] += 1
+        counts[-1] += value
+
+    def samples(self):
+        totals: Dict[Labels, list] = {}
+        for shard in list(self._shards):
+            for labels, counts in list(shard.items()):
+                total = totals.get(labels)
+                if total is None:
+                    totals[labels] = list(counts)
+                else:
+                    for i, count in enumerate(counts):
+                        total[i] += count
+        bounds = [_format_value(float(bound)) for bound in self.buckets] + ['+Inf']
+        for labels in sorted(totals):
+            counts = totals[labels]
+            cumulative = 0
+            for bound, count in zip(bounds, counts):
+                cumulative += count
+                yield '_bucket', labels, (('le', bound),), cumulative
+            yield '_sum', labels, (), counts[-1]
+            yield '_count', labels, (), cumulative
+
+
+class Collected(_Metric):
+    """
+    Gauge or counter read from existing stats at scrape time. `collect`
+    returns (label values, value) pairs
+    """
+
+    def __init__(self, name: str, help: str, collect: Callable[[], Iterable[Tuple[Labels, float]]],
+                 labelnames: Sequence[str] = (), kind: str = 'gauge'):
+        super().__init__(name, help, labelnames)
+        self.collect = collect
+        self.kind = kind
+
+    def samples(self):
+        for labels, value in self.collect():
+            yield '', tuple(labels), (), value
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics: List[_Metric] = []
+
+    def register(self, metric: _Metric) -> _Metric:
+        self._metrics.append(metric)
+        return metric
+
+    def counter(self, name: str, help: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self.register(Counter(name, help, labelnames))
+
+    def histogram(self, name: str, help: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, help, labelnames, buckets))
+
+    def collected(self, name: str, help: str, collect, labelnames: Sequence[str] = (),
+                  kind: str = 'gauge') -> Collected:
+        return self.register(Collected(name, help, collect, labelnames, kind))
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+
+class MetricsMiddleware:
+    """
+    Pure ASGI middleware timing every HTTP request into `histogram`, labelled
+    by method, route template (so path parameters do not create new series)
+    and status code. Exceptions escaping the app are counted in `errors` by
+    class and recorded as status 500
+    """
+
+    def __init__(self, app, histogram: Histogram, errors: Optional[Counter] = None):
+        self.app = app
+        self.histogram = histogram
+        self.errors = errors
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        status = 500
+
+        async def send_with_status(message):
+            nonlocal status
+            if message['type'] == 'http.response.start':
+                status = message['status']
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        except Exception as e:
+            status = 500
+            if self.errors is not None:
+                self.errors.inc('http', type(e).__name__)
+            raise
+        finally:
+            # The router stores the matched route in the scope we passed on
+            route = getattr(scope.get('route'), 'path', None) or 'unmatched'
+            self.histogram.observe(time.perf_counter() - started, scope['method'], route, str(status))
+
+
+class MongoCommandMetrics(monitoring.CommandListener):
+    """
+    Driver command listener timing every collection command into
+    `histogram` by collection and command name, using the driver's own
+    round-trip measurement. Runs on the driver's threads, which is why
+    metrics are sharded per thread. Failed commands are counted in
+    `errors` by server error code name
+    """
+
+    def __init__(self, histogram: Histogram, errors: Optional[Counter] = None):
+        self.histogram = histogram
+        self.errors = errors
+        self._collections: Dict[tuple, str] = {}
+
+    def started(self, event):
+        if event.command_name == 'getMore':
+            collection = event.command.get('collection')
+        else:
+            collection = event.command.get(event.command_name)
+        if isinstance(collection, str):
+            self._collections[(event.connection_id, event.request_id)] = collection
+
+    def _finished(self, event, outcome: str) -> Optional[str]:
+        collection = self._collections.pop((event.connection_id, event.request_id), None)
+        if collection is not None:
+            self.histogram.observe(event.duration_micros / 1e6, collection, event.command_name, outcome)
+        return collection
+
+    def succeeded(self, event):
+        self._finished(event, 'ok')
+
+    def failed(self, event):
+        if self._finished(event, 'error') is not None and self.errors is not None:
+            failure = event.failure if isinstance(event.failure, dict) else {}
+            self.errors.inc('mongodb', failure.get('codeName') or 'CommandFailed')
@@ -0,0 +1,132 @@
+"""
+Accept-negotiated response encodings: JSON, MessagePack and a compact
+columnar form of row lists
+"""
+from datetime import datetime
+from typing import Iterable, List, Optional
+
+import msgpack
+
+from fast_json import dumps
+
+JSON = 'application/json'
+MSGPACK = 'application/msgpack'
+COLUMNAR_JSON = 'application/vnd.video.columnar+json'
+COLUMNAR_MSGPACK = 'application/vnd.video.columnar+msgpack'
+
+# In order of preference when the client accepts several equally
+MEDIA_TYPES = (JSON, MSGPACK, COLUMNAR_JSON, COLUMNAR_MSGPACK)
+COLUMNAR = (COLUMNAR_JSON, COLUMNAR_MSGPACK)
+
+_ALIASES = {'application/x-msgpack': MSGPACK}
+
+
+def negotiate(accept: Optional[str]) -> str:
+    """
+    Best supported media type for an Accept header; JSON when nothing
+    supported is asked for
+    """
+    best = JSON
+    best_score = (0.0, -1, 0)
+    for part in (accept or '').split(','):
+        media_range, *params = [piece.strip() for piece in part.split(';')]
+        media_range = _ALIASES.get(media_range.lower(), media_range.lower())
+        if not media_range:
+            continue
+        q = 1.0
+        for param in params:
+            if param.startswith('q='):
+                try:
+                    q = float(param[2:])
+                except ValueError:
+                    q = 0.0
+        if q <= 0:
+            continue
+        for rank, media_type in enumerate(MEDIA_TYPES):
+            if media_range == media_type:
+                specificity = 2
+            elif media_range == media_type.split('/')[0] + '/*':
+                specificity = 1
+            elif media_range == '*/*':
+                specificity = 0
+            else:
+                continue
+            score = (q, specificity, -rank)
+            if score > best_score:
+                best, best_score = media_type, score
+    return best
+
+
+def _url_prefix(url: str) -> str:
+    """
+    Scheme, host and first path segment, e.g. 'https://i.ytimg.com/vi/'
+    """
+    host_end = url.find('/', url.find('//') + 2)
+    if host_end < 0:
+        return ''
+    segment_end = url.find('/', host_end + 1)
+    return url[:segment_end + 1] if segment_end >= 0 else url[:host_end + 1]
+
+
+def to_columnar(rows: Iterable[dict], fields: List[str], interned: Iterable[str] = (),
+                prefixed: Iterable[str] = (), timestamps: Iterable[str] = ()) -> dict:
+    """
+    Rows as parallel per-field arrays. Values of `interned` fields are
+    indexes into one shared `strings` table; `prefixed` (URL) fields are
+    [index of their prefix in `strings`, rest of the URL], or null when
+    empty; `timestamps` fields are epoch milliseconds
+    """
+    interned = set(interned)
+    prefixed = set(prefixed)
+    timestamps = set(timestamps)
+    strings: List[str] = []
+    index = {}
+
+    def intern(value: str) -> int:
+        position = index.get(value)
+        if position is None:
+            position = index[value] = len(strings)
+            strings.append(value)
+        return position
+
+    columns = {field: [] for field in fields}
+    count = 0
+    for row in rows:
+        count += 1
+        for field in fields:
+            value = row.get(field)
+            if field in interned:
+                value = intern(value or '')
+            elif field in prefixed:
+                if value:
+                    prefix = _url_prefix(value)
+                    value = [intern(prefix), value[len(prefix):]]
+                else:
+                    value = None
+            elif field in timestamps and isinstance(value, datetime):
+                value = int(value.timestamp() * 1000)
+            columns[field].append(value)
+
+    encodings = {field: 'string_table' for field in fields if field in interned}
+    encodings.update({field: 'prefix' for field in fields if field in prefixed})
+    encodings.update({field: 'epoch_ms' for field in fields if field in timestamps})
+    return {
+        "count": count,
+        "fields": fields,
+        "encodings": encodings,
+        "strings": strings,
+        "columns": columns,
+    }
+
+
+def _msgpack_default(value):
+    if isinstance(value, datetime):
+        # Same text form as the JSON responses
+        return dumps(value).decode('utf-8').strip('"')
+    raise TypeError(f"Cannot serialize {type(value).__name__} to MessagePack")
+
+
+def render(content, media_type: str) -> bytes:
+    if media_type in (MSGPACK, COLUMNAR_MSGPACK):
+        return msgpack.packb(content, default=_msgpack_default)
+    return dumps(content)
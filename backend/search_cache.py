@@ -0,0 +1,451 @@
+"""
+Search result caches: an in-process tier with a byte budget and TinyLFU
+admission, a shared MongoDB tier with TTL expiry, and a short-lived
+negative cache for queries that keep coming back empty
+"""
+import asyncio
+import json
+import logging
+import math
+import random
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from typing import Any, NamedTuple, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class SearchKey(NamedTuple):
+    query: str
+    limit: int
+    locale: str
+
+
+def normalize_query(q: str) -> str:
+    """
+    Canonical form used for cache keys: lowercased, whitespace collapsed
+    """
+    return ' '.join(q.lower().split())
+
+
+def estimate_size(value: Any) -> int:
+    """
+    Approximate memory cost of a cached value, measured as its compact JSON size
+    """
+    return len(json.dumps(value, separators=(',', ':'), default=str).encode('utf-8'))
+
+
+class FrequencySketch:
+    """
+    Count-min sketch of recent access frequency.
+
+    Counters saturate at 15 and are halved once `sample_size` increments have
+    been recorded, so the sketch tracks recent popularity rather than
+    all-time totals.
+    """
+
+    DEPTH = 4
+    MAX_COUNT = 15
+
+    def __init__(self, width: int = 4096):
+        self.width = 1 << max(4, (width - 1).bit_length())
+        self._mask = self.width - 1
+        self._rows = [[0] * self.width for _ in range(self.DEPTH)]
+        self.sample_size = 10 * self.width
+        self._additions = 0
+
+    def _indexes(self, key):
+        h = hash(key)
+        for seed in range(self.DEPTH):
+            yield seed, hash((seed, h)) & self._mask
+
+    def increment(self, key):
+        added = False
+        for row, i in self._indexes(key):
+            if self._rows[row][i] < self.MAX_COUNT:
+                self._rows[row][i] += 1
+                added = True
+        if added:
+            self._additions += 1
+            if self._additions >= self.sample_size:
+                self._reset()
+
+    def estimate(self, key) -> int:
+        return min(self._rows[row][i] for row, i in self._indexes(key))
+
+    def _reset(self):
+        for row in self._rows:
+            for i, count in enumerate(row):
+                row[i] = count >> 1
+        self._additions //= 2
+
+
+class CacheEntry:
+    """
+    A cached value with its freshness window.
+
+    An entry is fresh until `expires_at`, then stale (still servable while a
+    refresh runs) until `stale_until`. `delta` is how long the value took to
+    compute, used to schedule probabilistic early refreshes. `body` is an
+    optional pre-encoded response for value (anything with a `size`).
+    """
+
+    __slots__ = ('value', 'size', 'stored_at', 'expires_at', 'stale_until', 'delta', 'body')
+
+    def __init__(self, value, size, stored_at, expires_at, stale_until, delta, body=None):
+        self.value = value
+        self.body = body
+        self.size = size
+        self.stored_at = stored_at
+        self.expires_at = expires_at
+        self.stale_until = stale_until
+        self.delta = delta
+
+    @property
+    def age(self) -> float:
+        return max(0.0, time.monotonic() - self.stored_at)
+
+    @property
+    def fresh_for(self) -> float:
+        """Seconds until the entry goes stale (0 once it has)"""
+        return max(0.0, self.expires_at - time.monotonic())
+
+    @property
+    def staleness(self) -> float:
+        """Seconds since the entry stopped being fresh (0 while fresh)"""
+        return max(0.0, time.monotonic() - self.expires_at)
+
+    @property
+    def is_stale(self) -> bool:
+        return time.monotonic() >= self.expires_at
+
+    def should_refresh(self, beta: float = 1.0) -> bool:
+        """
+        True if the entry is stale, or - with a probability that grows as
+        expiry approaches and with the cost of recomputing it - if it should
+        be refreshed early ("XFetch", Vattani et al.)
+        """
+        now = time.monotonic()
+        if now >= self.expires_at:
+            return True
+        if self.delta <= 0 or beta <= 0:
+            return False
+        return now - self.delta * beta * math.log(1.0 - random.random()) >= self.expires_at
+
+
+class SearchCache:
+    """
+    LRU cache bounded by the total size of its values in bytes.
+
+    Entries are fresh for `ttl` seconds and may then be served stale for
+    `stale_ttl` more seconds while they are refreshed. When the budget is
+    exceeded a new entry is only admitted if the frequency sketch rates it
+    more popular than every LRU victim it would displace, so a burst of
+    one-off queries cannot flush the hot set. Used from the event loop only,
+    so no locking.
+    """
+
+    def __init__(self, max_bytes: int = 16 * 1024 * 1024, ttl: float = 300.0,
+                 stale_ttl: float = 0.0, sketch_width: int = 4096):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self._entries: "OrderedDict[Any, CacheEntry]" = OrderedDict()
+        self._bytes = 0
+        self._sketch = FrequencySketch(sketch_width)
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.rejections = 0
+
+    def lookup(self, key) -> Optional[CacheEntry]:
+        """
+        Return the entry for key if it is fresh or still within its stale window
+        """
+        self._sketch.increment(key)
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        now = time.monotonic()
+        if entry.stale_until <= now:
+            self._remove(key)
+            self.expirations += 1
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        if entry.expires_at <= now:
+            self.stale_hits += 1
+        else:
+            self.hits += 1
+        return entry
+
+    def peek(self, key, allow_expired: bool = False) -> Optional[CacheEntry]:
+        """
+        Like lookup, but without touching recency, frequency or counters.
+        With allow_expired, entries past their stale window that have not
+        been removed yet are returned too (last-resort degraded data).
+        """
+        entry = self._entries.get(key)
+        if entry is None or (not allow_expired and entry.stale_until <= time.monotonic()):
+            return None
+        return entry
+
+    def get(self, key) -> Optional[Any]:
+        """
+        Return the cached value for key, or None if it is missing or stale
+        """
+        entry = self.lookup(key)
+        if entry is None or entry.is_stale:
+            return None
+        return entry.value
+
+    def set(self, key, value, ttl: Optional[float] = None, delta: float = 0.0,
+            age: float = 0.0, body=None) -> bool:
+        """
+        Store value under key; returns False if admission was refused.
+
+        `delta` is the time it took to compute value and `age` backdates an
+        entry that was computed elsewhere (e.g. loaded from the shared store).
+        `body` is kept alongside and counts towards the byte budget.
+        """
+        size = estimate_size(value) + (body.size if body is not None else 0)
+        if size > self.max_bytes:
+            self.rejections += 1
+            return False
+
+        # Pick every victim needed to make room before removing any, so a
+        # refused candidate leaves the cache as it was. Expired victims are
+        # free to take; live ones must be less popular than the candidate,
+        # unless key is already cached and only its value is replaced
+        now = time.monotonic()
+        current = self._entries.get(key)
+        excess = self._bytes - (current.size if current is not None else 0) + size - self.max_bytes
+        victims = []
+        if excess > 0:
+            candidate_freq = self._sketch.estimate(key)
+            for victim_key, victim in self._entries.items():
+                if excess <= 0:
+                    break
+                if victim_key == key:
+                    continue
+                expired = victim.stale_until <= now
+                if not expired and current is None \
+                        and candidate_freq <= self._sketch.estimate(victim_key):
+                    self.rejections += 1
+                    return False
+                victims.append((victim_key, expired))
+                excess -= victim.size
+
+        for victim_key, expired in victims:
+            self._remove(victim_key)
+            if expired:
+                self.expirations += 1
+            else:
+                self.evictions += 1
+        if current is not None:
+            self._remove(key)
+
+        expires_at = now + (self.ttl if ttl is None else ttl)
+        self._entries[key] = CacheEntry(
+            value, size, now - age, expires_at, expires_at + self.stale_ttl, delta, body
+        )
+        self._bytes += size
+        return True
+
+    def invalidate(self, key):
+        if key in self._entries:
+            self._remove(key)
+
+    def _remove(self, key):
+        entry = self._entries.pop(key)
+        self._bytes -= entry.size
+
+    def __len__(self):
+        return len(self._entries)
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.stale_hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "max_bytes": self.max_bytes,
+            "ttl": self.ttl,
+            "stale_ttl": self.stale_ttl,
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+            "hit_ratio": round((self.hits + self.stale_hits) / lookups, 4) if lookups else 0.0,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "rejections": self.rejections,
+        }
+
+
+def _as_utc(value: datetime) -> datetime:
+    # Motor returns naive datetimes (in UTC) unless the client is tz_aware
+    return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+
+
+class MongoSearchCache:
+    """
+    Second cache tier shared by every worker and node, stored in a MongoDB
+    collection with one document per (query, limit, locale).
+
+    A TTL index on `expires_at` lets mongod delete expired documents; reads
+    also filter on it because the TTL monitor only runs once a minute.
+    Failures and operations slower than `timeout` are logged and treated as
+    misses so a Mongo outage never takes search down with it.
+    """
+
+    def __init__(self, collection, ttl: float = 3600.0, timeout: float = 1.0):
+        self.collection = collection
+        self.ttl = ttl
+        self.timeout = timeout
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+        self.errors = 0
+
+    async def ensure_indexes(self):
+        await self.collection.create_index(
+            [("query", 1), ("limit", 1), ("locale", 1)],
+            unique=True, name="query_limit_locale",
+        )
+        await self.collection.create_index(
+            "expires_at", expireAfterSeconds=0, name="expires_at_ttl"
+        )
+
+    @staticmethod
+    def _filter(key: SearchKey) -> dict:
+        return {"query": key.query, "limit": key.limit, "locale": key.locale}
+
+    async def get(self, key: SearchKey, allow_expired: bool = False) -> Optional[dict]:
+        """
+        Return the stored entry ({items, created_at, expires_at, delta}) or
+        None. With allow_expired, an expired document the TTL monitor has not
+        deleted yet is returned too (last-resort degraded data).
+        """
+        query = self._filter(key)
+        if not allow_expired:
+            query["expires_at"] = {"$gt": datetime.now(timezone.utc)}
+        try:
+            doc = await asyncio.wait_for(self.collection.find_one(
+                query,
+                {"_id": 0, "items": 1, "created_at": 1, "expires_at": 1, "delta": 1},
+            ), self.timeout)
+        except Exception as e:
+            self.errors += 1
+            logger.warning(f"Search cache read failed for '{key.query}': {e!r}")
+            return None
+        if doc is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        doc['created_at'] = _as_utc(doc['created_at'])
+        doc['expires_at'] = _as_utc(doc['expires_at'])
+        return doc
+
+    async def set(self, key: SearchKey, items: list, ttl: Optional[float] = None,
+                  delta: float = 0.0):
+        now = datetime.now(timezone.utc)
+        expires_at = now + timedelta(seconds=self.ttl if ttl is None else ttl)
+        try:
+            await asyncio.wait_for(self.collection.update_one(
+                self._filter(key),
+                {"$set": {"items": items, "created_at": now, "expires_at": expires_at,
+                          "delta": delta}},
+                upsert=True,
+            ), self.timeout)
+            self.writes += 1
+        except Exception as e:
+            self.errors += 1
+            logger.warning(f"Search cache write failed for '{key.query}': {e!r}")
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "ttl": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+            "writes": self.writes,
+            "errors": self.errors,
+        }
+
+
+class NegativeEntry:
+    __slots__ = ('outcome', 'cost', 'strikes', 'expires_at')
+
+    def __init__(self, outcome, cost, strikes, expires_at):
+        self.outcome = outcome
+        self.cost = cost
+        self.strikes = strikes
+        self.expires_at = expires_at
+
+
+class NegativeCache:
+    """
+    Remembers queries whose upstream search came back empty or failed to
+    parse, so repeats are answered without scraping again.
+
+    `outcome` is 'empty' or the exception class name. The TTL starts at
+    `ttl` and doubles each time the same outcome is recorded again (up to
+    `max_ttl`), so reliably bad queries are retried less and less often
+    while one-off blips expire quickly. `cost` is the upstream time the
+    failed search took, accumulated into `saved_seconds` on every
+    short-circuit. Used from the event loop only, so no locking.
+    """
+
+    def __init__(self, ttl: float = 30.0, max_ttl: float = 900.0, max_entries: int = 10000):
+        self.ttl = ttl
+        self.max_ttl = max_ttl
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Any, NegativeEntry]" = OrderedDict()
+        self.recorded = 0
+        self.short_circuits = 0
+        self.saved_seconds = 0.0
+        self.outcomes: dict = {}
+
+    def get(self, key) -> Optional[NegativeEntry]:
+        """
+        Return the live entry for key and count the upstream time it saves
+        """
+        entry = self._entries.get(key)
+        if entry is None or entry.expires_at <= time.monotonic():
+            return None
+        self.short_circuits += 1
+        self.saved_seconds += entry.cost
+        self.outcomes[entry.outcome] = self.outcomes.get(entry.outcome, 0) + 1
+        return entry
+
+    def record(self, key, outcome: str, cost: float):
+        now = time.monotonic()
+        previous = self._entries.pop(key, None)
+        strikes = 1
+        # Entries are kept past expiry (up to max_ttl) to remember strikes
+        if previous is not None and previous.outcome == outcome \
+                and previous.expires_at + self.max_ttl > now:
+            strikes = previous.strikes + 1
+        ttl = min(self.ttl * 2 ** (strikes - 1), self.max_ttl)
+        self._entries[key] = NegativeEntry(outcome, cost, strikes, now + ttl)
+        self.recorded += 1
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def discard(self, key):
+        self._entries.pop(key, None)
+
+    def stats(self) -> dict:
+        now = time.monotonic()
+        return {
+            "entries": len(self._entries),
+            "live": sum(1 for entry in self._entries.values() if entry.expires_at > now),
+            "recorded": self.recorded,
+            "short_circuits": self.short_circuits,
+            "saved_upstream_seconds": round(self.saved_seconds, 3),
+            "short_circuits_by_outcome": dict(self.outcomes),
+        }
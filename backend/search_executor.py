@@ -0,0 +1,104 @@
+"""
+Bounded thread pool for running blocking upstream searches off the event loop
+"""
+import asyncio
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+
+class SearchExecutorSaturated(RuntimeError):
+    """Raised when the search executor queue is full and a call is rejected"""
+
+
+class SearchExecutor:
+    """
+    Runs synchronous callables (e.g. VideosSearch) on a dedicated thread pool.
+
+    At most `max_workers` calls run at once and at most `max_queue` more may
+    wait for a free thread; anything beyond that is rejected immediately with
+    SearchExecutorSaturated instead of piling up behind a slow upstream.
+    """
+
+    def __init__(self, max_workers: int = 8, max_queue: int = 32):
+        self.max_workers = max(1, max_workers)
+        self.max_queue = max(0, max_queue)
+        self._pool = ThreadPoolExecutor(
+            max_workers=self.max_workers, thread_name_prefix="video-search"
+        )
+        self._lock = threading.Lock()
+        self._active = 0
+        self._queued = 0
+        self._peak_queued = 0
+        self._submitted = 0
+        self._completed = 0
+        self._failed = 0
+        self._rejected = 0
+
+    async def run(self, fn, *args, **kwargs):
+        """Run fn(*args, **kwargs) on the pool and await its result"""
+        with self._lock:
+            if self._active + self._queued >= self.max_workers + self.max_queue:
+                self._rejected += 1
+                raise SearchExecutorSaturated(
+                    f"Search executor saturated ({self._active} running, {self._queued} queued)"
+                )
+            self._queued += 1
+            self._submitted += 1
+            self._peak_queued = max(self._peak_queued, self._queued)
+
+        future = self._pool.submit(self._call, fn, args, kwargs)
+        future.add_done_callback(self._on_done)
+        return await asyncio.wrap_future(future)
+
+    def _call(self, fn, args, kwargs):
+        with self._lock:
+            self._queued -= 1
+            self._active += 1
+        try:
+            result = fn(*args, **kwargs)
+        except BaseException:
+            with self._lock:
+                self._failed += 1
+            raise
+        finally:
+            with self._lock:
+                self._active -= 1
+        with self._lock:
+            self._completed += 1
+        return result
+
+    def _on_done(self, future):
+        # A call cancelled before it reached a thread never ran _call
+        if future.cancelled():
+            with self._lock:
+                self._queued -= 1
+
+    @property
+    def queue_depth(self) -> int:
+        return self._queued
+
+    def stats(self) -> dict:
+        with self._lock:
+            active, queued = self._active, self._queued
+            return {
+                "workers": self.max_workers,
+                "max_queue": self.max_queue,
+                "active": active,
+                "queued": queued,
+                "peak_queued": self._peak_queued,
+                "utilization": round(active / self.max_workers, 3),
+                "saturation": round(
+                    (active + queued) / (self.max_workers + self.max_queue), 3
+                ),
+                "saturated": active + queued >= self.max_workers + self.max_queue,
+                "submitted": self._submitted,
+                "completed": self._completed,
+                "failed": self._failed,
+                "rejected": self._rejected,
+            }
+
+    def shutdown(self):
+        self._pool.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,141 @@
+"""
+Table-driven mapping of raw VideosSearch records to the frontend item format
+"""
+from typing import Optional
+
+# Marks the field filled from the best-fitting entry of record['thumbnails']
+THUMBNAIL = object()
+
+# Output field -> where it comes from: a path into the raw VideosSearch
+# record (of at most three steps), a constant string, or THUMBNAIL. Every
+# path step may be missing, None or of the wrong type; the field is then ''.
+ITEM_FIELDS = (
+    ('id', ('id',)),
+    ('type', 'video'),
+    ('title', ('title',)),
+    ('channelTitle', ('channel', 'name')),
+    ('thumbnail', THUMBNAIL),
+    ('description', ('descriptionSnippet', 0, 'text')),
+)
+
+
+def pick_thumbnail(thumbnails, width: Optional[int] = None) -> str:
+    """
+    URL of the smallest thumbnail at least `width` pixels wide (the largest
+    if none is), or of the first thumbnail when no width is requested
+    """
+    if not thumbnails or not isinstance(thumbnails, list):
+        return ''
+    if not width:
+        first = thumbnails[0]
+        return (first.get('url') or '') if isinstance(first, dict) else ''
+
+    best = None
+    best_width = 0
+    for thumb in thumbnails:
+        if not isinstance(thumb, dict) or not thumb.get('url'):
+            continue
+        thumb_width = thumb.get('width') or 0
+        if best is None:
+            best, best_width = thumb, thumb_width
+        elif best_width < width:
+            # Nothing big enough yet: prefer anything larger
+            if thumb_width > best_width:
+                best, best_width = thumb, thumb_width
+        elif width <= thumb_width < best_width:
+            # Already big enough: prefer the closest fit
+            best, best_width = thumb, thumb_width
+    return best['url'] if best else ''
+
+
+_LOOKUP_ERRORS = (KeyError, IndexError, TypeError)
+
+# With no width requested the thumbnail is simply the first one's URL
+_FIRST_THUMBNAIL = ('thumbnails', 0, 'url')
+
+
+def compile_fields(thumbnail_width: Optional[int]) -> tuple:
+    """
+    ITEM_FIELDS resolved once into what normalize_page does per record: a
+    template item holding the constants (and '' for every other field),
+    the paths grouped by length so each group's lookups are written out
+    without an inner loop, and the fields picked with pick_thumbnail
+    """
+    template = {}
+    paths = ([], [], [])
+    thumbnails = []
+    for name, source in ITEM_FIELDS:
+        template[name] = source if isinstance(source, str) else ''
+        if isinstance(source, str):
+            continue
+        if source is THUMBNAIL:
+            if thumbnail_width:
+                thumbnails.append(name)
+                continue
+            source = _FIRST_THUMBNAIL
+        if not 1 <= len(source) <= len(paths):
+            raise ValueError(f"Path for {name!r} must have 1 to {len(paths)} steps")
+        paths[len(source) - 1].append((name, *source))
+    return (template, *map(tuple, paths), tuple(thumbnails))
+
+
+_FIELDS = compile_fields(None)
+_SIZED_FIELDS = compile_fields(1)
+
+
+def normalize_page(records, thumbnail_width: Optional[int] = None) -> list:
+    """
+    Map a page of raw VideosSearch records to frontend items in one pass
+    per record over the compiled fields, skipping anything that is not a
+    record. Path steps are attempted directly and failures caught, which
+    leaves the template's ''; falsy values are tested first since raising
+    is slow and None is the common missing value
+    """
+    template, keys, pairs, triples, thumbnails = _SIZED_FIELDS if thumbnail_width else _FIELDS
+    new_item = template.copy
+    errors = _LOOKUP_ERRORS
+    items = []
+    append = items.append
+    for record in records or ():
+        if not isinstance(record, dict):
+            continue
+        item = new_item()
+        for name, key in keys:
+            try:
+                value = record[key]
+            except KeyError:
+                continue
+            if value:
+                item[name] = value
+        for name, key, step in pairs:
+            try:
+                value = record[key]
+                if value:
+                    value = value[step]
+            except errors:
+                continue
+            if value:
+                item[name] = value
+        for name, key, step, last in triples:
+            try:
+                value = record[key]
+                if value:
+                    value = value[step][last]
+            except errors:
+                continue
+            if value:
+                item[name] = value
+        if thumbnails:
+            for name in thumbnails:
+                item[name] = pick_thumbnail(record.get('thumbnails'), thumbnail_width)
+        append(item)
+    return items
+
+
+def normalize_results(results, thumbnail_width: Optional[int] = None) -> list:
+    """
+    normalize_page for a VideosSearch.result() dict ({'result': [...]})
+    """
+    if not results or not isinstance(results, dict):
+        return []
+    return normalize_page(results.get('result'), thumbnail_width)
@@ -0,0 +1,131 @@
+"""
+Server-side continuation state for paging through search results
+"""
+import asyncio
+import base64
+import json
+import time
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+from search_cache import SearchKey
+
+# Same bounds as the `limit` query parameter of /api/search/videos
+MIN_PAGE_LIMIT = 1
+MAX_PAGE_LIMIT = 50
+
+
+def encode_page_token(key: SearchKey, page: int) -> str:
+    """
+    Opaque token for page `page` (2 or later) of the results for key.
+
+    Tokens are deterministic so every client paging the same query shares
+    one continuation state, and page-one responses stay cacheable.
+    """
+    raw = json.dumps([key.query, key.limit, key.locale, page], separators=(',', ':'))
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_page_token(token: str) -> Tuple[SearchKey, int]:
+    """
+    Inverse of encode_page_token; raises ValueError for malformed tokens,
+    for limits outside what the API accepts and for page one, which is
+    never reached through a token
+    """
+    try:
+        raw = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4))
+        query, limit, locale, page = json.loads(raw)
+    except Exception:
+        raise ValueError("Invalid page token")
+    if not isinstance(query, str) or not isinstance(locale, str) \
+            or not isinstance(limit, int) or not isinstance(page, int) or page < 2 \
+            or not MIN_PAGE_LIMIT <= limit <= MAX_PAGE_LIMIT:
+        raise ValueError("Invalid page token")
+    return SearchKey(query, limit, locale), page
+
+
+class PaginationState:
+    """
+    Live VideosSearch for one key plus every page fetched from it so far.
+
+    `search` is advanced with next(); pages are kept so a page is scraped at
+    most once per state, and `seen_ids` drops videos that YouTube repeats
+    across pages. Hold `lock` while advancing.
+    """
+
+    def __init__(self, key: SearchKey):
+        self.key = key
+        self.search = None
+        self.pages: list = []
+        self.seen_ids: set = set()
+        self.exhausted = False
+        self.lock = asyncio.Lock()
+        self.touched_at = time.monotonic()
+
+    def add_page(self, items: list) -> list:
+        page = []
+        for item in items:
+            video_id = item.get('id')
+            if not video_id or video_id in self.seen_ids:
+                continue
+            self.seen_ids.add(video_id)
+            page.append(item)
+        self.pages.append(page)
+        return page
+
+
+class PaginationStore:
+    """
+    LRU of PaginationState objects that expire `ttl` seconds after last use
+    """
+
+    def __init__(self, ttl: float = 600.0, max_states: int = 1000):
+        self.ttl = ttl
+        self.max_states = max_states
+        self._states: "OrderedDict[SearchKey, PaginationState]" = OrderedDict()
+        self.created = 0
+        self.expired = 0
+        self.evicted = 0
+
+    def get(self, key: SearchKey) -> Optional[PaginationState]:
+        state = self._states.get(key)
+        if state is None:
+            return None
+        if state.touched_at + self.ttl <= time.monotonic() and not state.lock.locked():
+            del self._states[key]
+            self.expired += 1
+            return None
+        state.touched_at = time.monotonic()
+        self._states.move_to_end(key)
+        return state
+
+    def get_or_create(self, key: SearchKey) -> PaginationState:
+        state = self.get(key)
+        if state is None:
+            state = PaginationState(key)
+            self._states[key] = state
+            self.created += 1
+            while len(self._states) > self.max_states:
+                self._states.popitem(last=False)
+                self.evicted += 1
+        return state
+
+    def seed(self, key: SearchKey, search, items: list):
+        """
+        Start a state from a search that has just fetched page one, unless
+        one is already live for key
+        """
+        if self.get(key) is not None:
+            return
+        state = self.get_or_create(key)
+        state.search = search
+        state.add_page(items)
+
+    def stats(self) -> dict:
+        return {
+            "states": len(self._states),
+            "ttl": self.ttl,
+            "created": self.created,
+            "expired": self.expired,
+            "evicted": self.evicted,
+        }
@@ -0,0 +1,130 @@
+"""
+Hedged execution of alternative search strategies with per-query memory
+"""
+import asyncio
+import logging
+from collections import OrderedDict
+from typing import Awaitable, Callable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+DIRECT = 'direct'
+CLEANED = 'cleaned'
+
+
+def clean_query(q: str) -> str:
+    """
+    Sanitized variant of q: special characters removed, limited to 50 chars
+    """
+    return ''.join(c for c in q if c.isalnum() or c.isspace()).strip()[:50]
+
+
+class StrategyEngine:
+    """
+    Races a list of (name, attempt) strategies for one query.
+
+    The first strategy starts immediately. The next one is launched as soon
+    as the running ones have all failed or returned an unacceptable answer,
+    or after `hedge_delay` seconds without any answer - whichever comes
+    first. The first acceptable answer wins and the other attempts are
+    cancelled.
+
+    The winning strategy is remembered per query (LRU, `memory_size`
+    entries). When a query is known to need a later strategy, that strategy
+    is launched first and the others only hedge it, so known-problematic
+    queries go straight to what worked last time.
+    """
+
+    def __init__(self, hedge_delay: float = 2.0, memory_size: int = 10000):
+        self.hedge_delay = hedge_delay
+        self.memory_size = memory_size
+        self._winners: "OrderedDict[str, str]" = OrderedDict()
+        self.races = 0
+        self.hedged = 0
+        self.reordered = 0
+        self.wins: dict = {}
+        self.unanswered = 0
+
+    def winner_for(self, query: str) -> Optional[str]:
+        return self._winners.get(query)
+
+    def remember(self, query: str, strategy: str):
+        self._winners[query] = strategy
+        self._winners.move_to_end(query)
+        while len(self._winners) > self.memory_size:
+            self._winners.popitem(last=False)
+
+    async def run(self, query: str, attempts: List[Tuple[str, Callable[[], Awaitable]]],
+                  accept: Callable = bool):
+        """
+        Return (result, strategy name) of the first attempt whose result
+        passes `accept`. If none does, the first unaccepted result is
+        returned; if every attempt raised, the first exception is re-raised.
+        """
+        self.races += 1
+        remembered = self.winner_for(query)
+        if remembered is not None and remembered != attempts[0][0]:
+            preferred = [attempt for attempt in attempts if attempt[0] == remembered]
+            if preferred:
+                self.reordered += 1
+                attempts = preferred + [attempt for attempt in attempts if attempt[0] != remembered]
+
+        names = {}
+        pending = set()
+        next_attempt = 0
+        answers = []
+        errors = []
+
+        def launch():
+            nonlocal next_attempt
+            name, attempt = attempts[next_attempt]
+            next_attempt += 1
+            task = asyncio.ensure_future(attempt())
+            names[task] = name
+            pending.add(task)
+
+        launch()
+        try:
+            while pending or next_attempt < len(attempts):
+                if not pending:
+                    launch()
+                    continue
+                timeout = self.hedge_delay if next_attempt < len(attempts) else None
+                done, _ = await asyncio.wait(pending, timeout=timeout,
+                                             return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    self.hedged += 1
+                    logger.info(f"Hedging '{query}' with strategy {attempts[next_attempt][0]}")
+                    launch()
+                    continue
+                for task in done:
+                    pending.discard(task)
+                    name = names[task]
+                    if task.exception() is not None:
+                        logger.warning(f"Search strategy {name} failed for '{query}': {task.exception()}")
+                        errors.append(task.exception())
+                    elif accept(task.result()):
+                        self.wins[name] = self.wins.get(name, 0) + 1
+                        self.remember(query, name)
+                        return task.result(), name
+                    else:
+                        answers.append((task.result(), name))
+        finally:
+            for task in pending:
+                task.cancel()
+
+        self.unanswered += 1
+        if answers:
+            return answers[0]
+        raise errors[0]
+
+    def stats(self) -> dict:
+        return {
+            "hedge_delay": self.hedge_delay,
+            "races": self.races,
+            "hedged": self.hedged,
+            "reordered": self.reordered,
+            "wins": dict(self.wins),
+            "unanswered": self.unanswered,
+            "remembered": len(self._winners),
+        }
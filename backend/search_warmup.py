@@ -0,0 +1,97 @@
+"""
+Background cache warming for a configured list of hot queries
+"""
+import asyncio
+import logging
+import time
+from typing import Awaitable, Callable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class CacheWarmer:
+    """
+    Calls `warm(query)` for every hot query, one at a time with `delay`
+    seconds between them so warming never bursts upstream, then repeats the
+    whole list every `interval` seconds (0 warms once).
+
+    `warm` returns True if it did upstream or store work and False if the
+    query was already fresh; only real work is followed by the delay.
+    Progress is exposed for readiness checks, but the app is ready as soon
+    as it starts - warming never blocks serving.
+    """
+
+    def __init__(self, queries: List[str], warm: Callable[[str], Awaitable[bool]],
+                 delay: float = 1.0, interval: float = 240.0):
+        self.queries = [q for q in queries if q.strip()]
+        self.warm = warm
+        self.delay = delay
+        self.interval = interval
+        self._task: Optional[asyncio.Task] = None
+        self.cycles = 0
+        self.warmed = 0
+        self.skipped = 0
+        self.failed = 0
+        self.current: Optional[str] = None
+        self.cycle_started_at: Optional[float] = None
+        self.cycle_finished_at: Optional[float] = None
+        self._done_in_cycle = 0
+
+    def start(self):
+        if self.queries and self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self):
+        while True:
+            await self.warm_all()
+            if self.interval <= 0:
+                return
+            await asyncio.sleep(self.interval)
+
+    async def warm_all(self):
+        self.cycle_started_at = time.time()
+        self._done_in_cycle = 0
+        for query in self.queries:
+            self.current = query
+            try:
+                worked = await self.warm(query)
+            except Exception as e:
+                worked = True
+                self.failed += 1
+                logger.warning(f"Cache warm-up failed for '{query}': {e}")
+            else:
+                if worked:
+                    self.warmed += 1
+                else:
+                    self.skipped += 1
+            self._done_in_cycle += 1
+            if worked and self.delay > 0:
+                await asyncio.sleep(self.delay)
+        self.current = None
+        self.cycles += 1
+        self.cycle_finished_at = time.time()
+        logger.info(f"Cache warm-up cycle {self.cycles} finished for {len(self.queries)} queries")
+
+    def progress(self) -> dict:
+        return {
+            "queries": len(self.queries),
+            "completed_cycles": self.cycles,
+            "warm": self.cycles > 0,
+            "done_in_cycle": self._done_in_cycle if self.current is not None else None,
+            "current": self.current,
+            "warmed": self.warmed,
+            "skipped": self.skipped,
+            "failed": self.failed,
+            "cycle_started_at": self.cycle_started_at,
+            "cycle_finished_at": self.cycle_finished_at,
+            "interval": self.interval,
+        }
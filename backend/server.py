@@ -1,27 +1,199 @@
-from fastapi import FastAPI, APIRouter, Query
+from fastapi import FastAPI, APIRouter, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
 from dotenv import load_dotenv
 from starlette.middleware.cors import CORSMiddleware
 from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo.errors import BulkWriteError
 import os
+import asyncio
+import csv
+import io
+import json
 import logging
+import math
+import time
 from pathlib import Path
 from pydantic import BaseModel, Field, ConfigDict
 from typing import List, Optional
 import uuid
-from datetime import datetime, timezone
+from datetime import date, datetime, timedelta, timezone
 from youtubesearchpython import VideosSearch
+from search_executor import SearchExecutor, SearchExecutorSaturated
+from search_cache import MongoSearchCache, NegativeCache, SearchCache, SearchKey, normalize_query
+from singleflight import SingleFlight
+from search_pagination import PaginationStore, decode_page_token, encode_page_token
+from search_normalize import ITEM_FIELDS, normalize_results
+from search_warmup import CacheWarmer
+from circuit_breaker import CircuitBreaker, CircuitOpenError
+from search_strategy import CLEANED, DIRECT, StrategyEngine, clean_query
+from upstream_scheduler import BACKGROUND, INTERACTIVE, PAGINATION, UpstreamScheduler
+from encoded_body import EncodedBody
+from response_formats import COLUMNAR, JSON, negotiate, render, to_columnar
+from fast_json import FastJSONResponse, carried_headers, dumps, trusted_json
+from metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE, MetricsMiddleware, MetricsRegistry, MongoCommandMetrics
+from server_timing import ServerTimingMiddleware, record as record_timing, span
+from status_archive import StatusArchiver
+from status_buffer import StatusBuffer
+from status_checks import (
+    STATUS_SORT, StatusRollups, TimestampMigration, encode_status_cursor,
+    ensure_retention_index, ensure_status_indexes, parse_timestamp, status_page_filter, status_stats_pipeline,
+    truncate_timestamp,
+)
 
 
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
 
+# Prometheus metrics, served at /api/metrics
+metrics = MetricsRegistry()
+http_request_seconds = metrics.histogram(
+    'http_request_duration_seconds', 'HTTP request latency by route template', ('method', 'route', 'status'),
+)
+upstream_search_seconds = metrics.histogram(
+    'youtube_search_duration_seconds', 'Time in blocking VideosSearch calls by strategy', ('strategy', 'outcome'),
+)
+mongo_command_seconds = metrics.histogram(
+    'mongodb_command_duration_seconds', 'MongoDB command round trips by collection', ('collection', 'command', 'outcome'),
+)
+errors_total = metrics.counter(
+    'app_errors_total', 'Errors by where they were caught and exception class', ('source', 'exception'),
+)
+
+def record_error(source: str, error: BaseException):
+    errors_total.inc(source, type(error).__name__)
+
 # MongoDB connection
 mongo_url = os.environ['MONGO_URL']
-client = AsyncIOMotorClient(mongo_url)
+client = AsyncIOMotorClient(
+    mongo_url, tz_aware=True, tzinfo=timezone.utc,
+    event_listeners=[MongoCommandMetrics(mongo_command_seconds, errors_total)],
+)
 db = client[os.environ['DB_NAME']]
 
+# Thread pool for blocking upstream searches so they never run on the event loop
+search_executor = SearchExecutor(
+    max_workers=int(os.environ.get('SEARCH_EXECUTOR_WORKERS', '8')),
+    max_queue=int(os.environ.get('SEARCH_EXECUTOR_MAX_QUEUE', '32')),
+)
+
+# Global rate limit and priority queue for YouTube calls, so bursts do not
+# get us throttled and background work never delays user searches
+upstream_scheduler = UpstreamScheduler(
+    rate=float(os.environ.get('SEARCH_UPSTREAM_RATE', '5')),
+    burst=int(os.environ.get('SEARCH_UPSTREAM_BURST', '10')),
+    max_concurrency=int(os.environ.get('SEARCH_UPSTREAM_CONCURRENCY', '4')),
+)
+
+# Every upstream call must finish within this many seconds of the request starting
+SEARCH_DEADLINE = float(os.environ.get('SEARCH_DEADLINE', '10'))
+
+# Stop calling YouTube while it is failing or browning out. Local
+# back-pressure and the TypeError/AttributeError youtube-search-python
+# raises for one query it cannot parse say nothing about YouTube's health
+upstream_breaker = CircuitBreaker(
+    name='youtube',
+    failure_threshold=int(os.environ.get('SEARCH_BREAKER_FAILURES', '5')),
+    slow_call_threshold=float(os.environ.get('SEARCH_BREAKER_SLOW_CALL', '5')),
+    reset_timeout=float(os.environ.get('SEARCH_BREAKER_RESET', '30')),
+    excluded=(SearchExecutorSaturated, TypeError, AttributeError),
+)
+
+# Race the direct and cleaned-query searches; remembers which works per query
+search_strategies = StrategyEngine(
+    hedge_delay=float(os.environ.get('SEARCH_HEDGE_DELAY', '2.0')),
+    memory_size=int(os.environ.get('SEARCH_STRATEGY_MEMORY', '10000')),
+)
+
+# In-process cache of normalized search results, bounded by size in bytes
+search_cache = SearchCache(
+    max_bytes=int(os.environ.get('SEARCH_CACHE_MAX_BYTES', str(16 * 1024 * 1024))),
+    ttl=float(os.environ.get('SEARCH_CACHE_TTL', '300')),
+    stale_ttl=float(os.environ.get('SEARCH_CACHE_STALE_TTL', '600')),
+)
+# Scales how early cached results are probabilistically refreshed (0 disables)
+SEARCH_REFRESH_BETA = float(os.environ.get('SEARCH_REFRESH_BETA', '1.0'))
+# Shared second tier in MongoDB so restarts and new workers start warm
+search_store = MongoSearchCache(
+    db.search_cache,
+    ttl=float(os.environ.get('SEARCH_STORE_TTL', '3600')),
+    timeout=float(os.environ.get('SEARCH_STORE_TIMEOUT', '1.0')),
+)
+SEARCH_LOCALE = 'en-US'
+
+# Short-lived memory of queries that came back empty or failed to parse
+search_negative = NegativeCache(
+    ttl=float(os.environ.get('SEARCH_NEGATIVE_TTL', '30')),
+    max_ttl=float(os.environ.get('SEARCH_NEGATIVE_MAX_TTL', '900')),
+)
+
+# Identical concurrent cache misses share a single upstream search
+search_flights = SingleFlight()
+
+# Pick the thumbnail closest to this width (in px) instead of the first one
+SEARCH_THUMBNAIL_WIDTH = int(os.environ.get('SEARCH_THUMBNAIL_WIDTH', '0')) or None
+
+# Live continuation state so later pages use VideosSearch.next()
+search_pages = PaginationStore(
+    ttl=float(os.environ.get('SEARCH_PAGE_STATE_TTL', '600')),
+    max_states=int(os.environ.get('SEARCH_PAGE_STATE_MAX', '1000')),
+)
+# A page token may point at most this far past page one without a live
+# continuation that already reached the page before it, which bounds the
+# upstream next() calls one request can cause
+SEARCH_PAGE_MAX_RESUME = int(os.environ.get('SEARCH_PAGE_MAX_RESUME', '5'))
+
+# Batch search: most queries per request, and how many run at once
+SEARCH_BATCH_MAX_QUERIES = int(os.environ.get('SEARCH_BATCH_MAX_QUERIES', '25'))
+SEARCH_BATCH_CONCURRENCY = int(os.environ.get('SEARCH_BATCH_CONCURRENCY', '4'))
+
+# Background conversion of legacy ISO string status timestamps to BSON dates
+status_migration = TimestampMigration(
+    db.status_checks,
+    batch_size=int(os.environ.get('STATUS_MIGRATION_BATCH', '500')),
+)
+
+# Bulk ingest: most status checks per POST /api/status/bulk
+STATUS_BULK_MAX = int(os.environ.get('STATUS_BULK_MAX', '1000'))
+
+# Documents fetched per cursor round trip by /api/status/export
+STATUS_EXPORT_BATCH = int(os.environ.get('STATUS_EXPORT_BATCH', '1000'))
+
+# Optional write-behind batching of single POST /api/status inserts
+status_buffer = StatusBuffer(
+    db.status_checks,
+    max_batch=int(os.environ.get('STATUS_BUFFER_BATCH', '500')),
+    flush_interval=float(os.environ.get('STATUS_BUFFER_INTERVAL', '0.05')),
+    max_pending=int(os.environ.get('STATUS_BUFFER_MAX_PENDING', '10000')),
+) if os.environ.get('STATUS_WRITE_BEHIND', '0') == '1' else None
+
+# Optional per-minute/hour/day status check counts maintained on insert
+status_rollups = StatusRollups(db) if os.environ.get('STATUS_ROLLUPS', '0') == '1' else None
+
+# Retention: status checks older than this many days are deleted by a TTL
+# index (0 keeps them forever). With STATUS_ARCHIVE_DIR set, each day is
+# first copied to a gzipped NDJSON file there
+STATUS_RETENTION_DAYS = float(os.environ.get('STATUS_RETENTION_DAYS', '0'))
+status_archiver = StatusArchiver(
+    db.status_checks,
+    os.environ['STATUS_ARCHIVE_DIR'],
+    retention_days=STATUS_RETENTION_DAYS,
+    lead_days=float(os.environ.get('STATUS_ARCHIVE_LEAD_DAYS', '2')),
+    interval=float(os.environ.get('STATUS_ARCHIVE_INTERVAL', '3600')),
+    on_archived=lambda: ensure_retention_index(db, db.status_checks, STATUS_RETENTION_DAYS * 86400),
+    locks=db.status_archive_locks,
+) if STATUS_RETENTION_DAYS and os.environ.get('STATUS_ARCHIVE_DIR') else None
+
+# Strong references to fire-and-forget tasks so they are not garbage collected
+background_tasks = set()
+
+def spawn_background(coro):
+    task = asyncio.create_task(coro)
+    background_tasks.add(task)
+    task.add_done_callback(background_tasks.discard)
+    return task
+
 # Create the main app without a prefix
-app = FastAPI()
+app = FastAPI(default_response_class=FastJSONResponse)
 
 # Create a router with the /api prefix
 api_router = APIRouter(prefix="/api")
@@ -38,6 +210,82 @@ class StatusCheck(BaseModel):
 class StatusCheckCreate(BaseModel):
     client_name: str
 
+class StatusCheckBulkCreate(BaseModel):
+    items: List[StatusCheckCreate] = Field(..., min_length=1, max_length=STATUS_BULK_MAX)
+
+class BatchSearchQuery(BaseModel):
+    q: str
+    limit: int = Field(10, ge=1, le=50)
+
+class BatchSearchRequest(BaseModel):
+    queries: List[BatchSearchQuery] = Field(..., min_length=1, max_length=SEARCH_BATCH_MAX_QUERIES)
+
+
+def open_video_search(query: str, limit: int, timeout: Optional[float] = None):
+    """
+    Blocking VideosSearch call (fetches the first page), always run through
+    call_upstream
+    """
+    return VideosSearch(query, limit=limit, timeout=timeout)
+
+def advance_video_search(search, timeout: Optional[float] = None) -> bool:
+    """
+    Blocking VideosSearch.next() call; False once there are no more pages
+    """
+    search.timeout = timeout
+    return search.next()
+
+def search_deadline() -> float:
+    return time.monotonic() + SEARCH_DEADLINE
+
+async def call_upstream(fn, *args, deadline: float, priority: int = INTERACTIVE,
+                        strategy: str = DIRECT):
+    """
+    Run a blocking upstream call on the search executor under the circuit
+    breaker and the rate limiter. The time left until deadline bounds the
+    wait for a rate-limit slot, the wait for the thread and the HTTP timeout
+    inside the worker thread, so an abandoned call frees its thread. The
+    call itself is timed under `strategy`
+    """
+    if deadline - time.monotonic() <= 0:
+        raise TimeoutError("Search deadline exceeded")
+    called = time.perf_counter()
+    
+    async def attempt():
+        remaining = deadline - time.monotonic()
+        started = time.perf_counter()
+        record_timing('upstream-wait', started - called)
+        outcome = 'error'
+        try:
+            result = await asyncio.wait_for(search_executor.run(fn, *args, remaining), remaining)
+            outcome = 'ok'
+            return result
+        except asyncio.TimeoutError:
+            outcome = 'timeout'
+            raise TimeoutError(f"Upstream search exceeded its {SEARCH_DEADLINE:g}s deadline")
+        except asyncio.CancelledError:
+            # Lost a hedged race or the request went away
+            outcome = 'cancelled'
+            raise
+        finally:
+            elapsed = time.perf_counter() - started
+            upstream_search_seconds.observe(elapsed, strategy, outcome)
+            record_timing(f'upstream-{strategy}', elapsed)
+    
+    try:
+        # Ask the breaker first, so while it is open calls fail at once
+        # instead of queueing for (and spending) rate-limit tokens
+        probe = upstream_breaker.allow()
+        try:
+            return await upstream_scheduler.call(
+                priority, deadline - time.monotonic(), upstream_breaker.run, attempt
+            )
+        finally:
+            upstream_breaker.done(probe)
+    except Exception as e:
+        record_error('upstream', e)
+        raise
+
 # Add your routes to the router instead of directly to app
 @api_router.get("/")
 async def root():
@@ -48,118 +296,762 @@ async def create_status_check(input: StatusCheckCreate):
     status_dict = input.model_dump()
     status_obj = StatusCheck(**status_dict)
     
-    # Convert to dict and serialize datetime to ISO string for MongoDB
+    # Stored as a native BSON date so it can be range-queried and indexed
     doc = status_obj.model_dump()
-    doc['timestamp'] = doc['timestamp'].isoformat()
     
-    _ = await db.status_checks.insert_one(doc)
+    if status_buffer is not None:
+        with span('buffer'):
+            await status_buffer.add(doc)
+    else:
+        with span('mongo'):
+            _ = await db.status_checks.insert_one(doc)
+    if status_rollups is not None:
+        with span('rollups'):
+            await status_rollups.record([doc])
     return status_obj
 
+@api_router.post("/status/bulk", response_model=List[StatusCheck])
+async def create_status_checks_bulk(input: StatusCheckBulkCreate):
+    """
+    Insert many status checks in one unordered insert_many; returns the
+    ones that were stored
+    """
+    status_objs = [StatusCheck(**item.model_dump()) for item in input.items]
+    docs = [status_obj.model_dump() for status_obj in status_objs]
+    try:
+        with span('mongo'):
+            await db.status_checks.insert_many(docs, ordered=False)
+    except BulkWriteError as e:
+        failed = {error['index'] for error in e.details.get('writeErrors', [])}
+        logger.warning(f"Bulk status insert failed for {len(failed)} of {len(docs)} documents")
+        status_objs = [obj for i, obj in enumerate(status_objs) if i not in failed]
+        docs = [doc for i, doc in enumerate(docs) if i not in failed]
+    if status_rollups is not None and docs:
+        with span('rollups'):
+            await status_rollups.record(docs)
+    return status_objs
+
+@api_router.get("/status/stats")
+async def status_stats(
+    bucket: str = Query("hour", pattern="^(minute|hour|day)$", description="Bucket size"),
+    client_name: Optional[str] = Query(None, description="Only this client's status checks"),
+    since: Optional[datetime] = Query(None, description="Start of the range (default 24 hours ago)"),
+    until: Optional[datetime] = Query(None, description="End of the range (default now)"),
+):
+    """
+    Status check counts per client per time bucket, from the rollup
+    collections when enabled, otherwise aggregated from status_checks.
+    since and until are rounded down to bucket boundaries
+    """
+    since = truncate_timestamp(since or datetime.now(timezone.utc) - timedelta(days=1), bucket)
+    if until is not None:
+        until = truncate_timestamp(until, bucket)
+    
+    with span('mongo'):
+        if status_rollups is not None:
+            rows = await status_rollups.query(bucket, client_name, since, until)
+            source = "rollup"
+        else:
+            pipeline = status_stats_pipeline(bucket, client_name, since, until)
+            rows = await db.status_checks.aggregate(pipeline).to_list(None)
+            source = "aggregation"
+    
+    for row in rows:
+        row['bucket'] = parse_timestamp(row['bucket'])
+    return {"bucket": bucket, "source": source, "since": since, "until": until, "buckets": rows}
+
+@api_router.get("/status/archive")
+async def list_status_archive():
+    """
+    Days of status checks available in the cold archive
+    """
+    if status_archiver is None:
+        raise HTTPException(status_code=404, detail="Status archive is not enabled")
+    return {"days": await asyncio.to_thread(status_archiver.days)}
+
+@api_router.get("/status/archive/{day}")
+async def restream_status_archive(
+    day: date,
+    format: str = Query("ndjson", pattern="^(ndjson|csv)$", description="ndjson or csv"),
+    client_name: Optional[str] = Query(None, description="Only this client's status checks"),
+):
+    """
+    Stream one archived day of status checks in the same formats as
+    /status/export
+    """
+    if status_archiver is None:
+        raise HTTPException(status_code=404, detail="Status archive is not enabled")
+    if not await asyncio.to_thread(status_archiver.path_for(day).exists):
+        raise HTTPException(status_code=404, detail=f"No archive for {day}")
+    media_type = "text/csv" if format == "csv" else "application/x-ndjson"
+    return StreamingResponse(
+        restream_archive_rows(day, format, client_name),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="status_checks-{day}.{format}"'},
+    )
+
+STATUS_CHECK_PROJECTION = {"_id": 0, **{field: 1 for field in StatusCheck.model_fields}}
+
 @api_router.get("/status", response_model=List[StatusCheck])
-async def get_status_checks():
-    # Exclude MongoDB's _id field from the query results
-    status_checks = await db.status_checks.find({}, {"_id": 0}).to_list(1000)
+async def get_status_checks(
+    request: Request,
+    response: Response,
+    limit: int = Query(100, ge=1, le=1000, description="Status checks per page"),
+    after: Optional[str] = Query(None, description="X-Next-Cursor from a previous response"),
+    client_name: Optional[str] = Query(None, description="Only this client's status checks"),
+):
+    """
+    Status checks oldest first, one page at a time. X-Next-Cursor is set
+    when there are more; pass it back as `after`
+    """
+    try:
+        query = status_page_filter(client_name, after)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    # Project exactly the StatusCheck fields so the documents can be sent
+    # as-is; one extra document tells whether another page follows
+    cursor = db.status_checks.find(query, STATUS_CHECK_PROJECTION).sort(STATUS_SORT).limit(limit + 1)
+    with span('mongo'):
+        status_checks = await cursor.to_list(limit + 1)
+    if len(status_checks) > limit:
+        status_checks = status_checks[:limit]
+        last = status_checks[-1]
+        response.headers['X-Next-Cursor'] = encode_status_cursor(last['timestamp'], last['id'])
     
-    # Convert ISO string timestamps back to datetime objects
+    # Legacy ISO string timestamps, until status_migration has converted them
     for check in status_checks:
         if isinstance(check['timestamp'], str):
-            check['timestamp'] = datetime.fromisoformat(check['timestamp'])
+            check['timestamp'] = parse_timestamp(check['timestamp'])
+    
+    return negotiated_response(
+        status_checks, request, response, lambda rows: to_columnar(rows, **STATUS_COLUMNS)
+    )
+
+STATUS_EXPORT_FIELDS = ['id', 'client_name', 'timestamp']
+STATUS_EXPORT_CHUNK = 65536
+
+class StatusRowEncoder:
+    """
+    Renders status check documents as NDJSON lines or CSV rows (after a
+    header row), buffered into chunks of about STATUS_EXPORT_CHUNK bytes
+    """
+    
+    def __init__(self, fmt: str):
+        self.fmt = fmt
+        self.buffer = io.StringIO()
+        self.writer = csv.DictWriter(self.buffer, fieldnames=STATUS_EXPORT_FIELDS, extrasaction='ignore')
+        if fmt == "csv":
+            self.writer.writeheader()
+    
+    def add(self, doc: dict) -> Optional[str]:
+        """
+        Encode doc; returns a chunk to send once enough has accumulated
+        """
+        doc['timestamp'] = parse_timestamp(doc['timestamp']).isoformat()
+        if self.fmt == "csv":
+            self.writer.writerow(doc)
+        else:
+            self.buffer.write(json.dumps({field: doc.get(field) for field in STATUS_EXPORT_FIELDS}) + "\n")
+        if self.buffer.tell() >= STATUS_EXPORT_CHUNK:
+            return self.flush()
+        return None
+    
+    def flush(self) -> str:
+        chunk = self.buffer.getvalue()
+        self.buffer.seek(0)
+        self.buffer.truncate()
+        return chunk
+
+STATUS_COLUMNS = dict(
+    fields=list(StatusCheck.model_fields), interned=('client_name',), timestamps=('timestamp',),
+)
+
+async def export_status_rows(query: dict, fmt: str, offset: int, batch_size: int):
+    """
+    Yield every matching status check in STATUS_EXPORT_CHUNK-sized chunks,
+    reading the cursor batch_size documents at a time so memory stays
+    constant however much is exported
+    """
+    cursor = db.status_checks.find(query, {"_id": 0}).sort(STATUS_SORT) \
+        .skip(offset).batch_size(batch_size)
+    encoder = StatusRowEncoder(fmt)
+    try:
+        async for doc in cursor:
+            chunk = encoder.add(doc)
+            if chunk:
+                yield chunk
+        yield encoder.flush()
+    finally:
+        await cursor.close()
+
+def restream_archive_rows(day: date, fmt: str, client_name: Optional[str] = None):
+    """
+    Blocking counterpart of export_status_rows reading one archived day;
+    StreamingResponse iterates it in a worker thread
+    """
+    encoder = StatusRowEncoder(fmt)
+    for doc in status_archiver.read_day(day):
+        if client_name is not None and doc.get('client_name') != client_name:
+            continue
+        chunk = encoder.add(doc)
+        if chunk:
+            yield chunk
+    yield encoder.flush()
+
+@api_router.get("/status/export")
+async def export_status_checks(
+    format: str = Query("ndjson", pattern="^(ndjson|csv)$", description="ndjson or csv"),
+    client_name: Optional[str] = Query(None, description="Only this client's status checks"),
+    since: Optional[datetime] = Query(None, description="Only status checks at or after this time"),
+    until: Optional[datetime] = Query(None, description="Only status checks before this time"),
+    after: Optional[str] = Query(None, description="X-Next-Cursor from GET /api/status to start after"),
+    offset: int = Query(0, ge=0, description="Rows to skip, to resume an interrupted export"),
+    batch_size: int = Query(STATUS_EXPORT_BATCH, ge=1, le=10000, description="Documents per cursor batch"),
+):
+    """
+    Stream all matching status checks, oldest first, as NDJSON or CSV
+    """
+    try:
+        query = status_page_filter(client_name, after, since, until)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    media_type = "text/csv" if format == "csv" else "application/x-ndjson"
+    return StreamingResponse(
+        export_status_rows(query, format, offset, batch_size),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="status_checks.{format}"'},
+    )
+
+async def search_upstream(q: str, limit: int = 10, deadline: Optional[float] = None,
+                          priority: int = INTERACTIVE):
+    """
+    Run the upstream search for q, hedged with a cleaned variant of the query
+    for problematic queries. Returns the normalized items and the winning
+    strategy's live VideosSearch, so later pages continue from the query
+    that actually worked
+    """
+    if deadline is None:
+        deadline = search_deadline()
+    
+    async def direct():
+        search = await call_upstream(open_video_search, q, limit, deadline=deadline, priority=priority)
+        logger.info(f"Direct search successful for query: {q}")
+        with span('normalize'):
+            return normalize_results(search.result(), SEARCH_THUMBNAIL_WIDTH), search
     
-    return status_checks
+    attempts = [(DIRECT, direct)]
+    
+    # Modified query (remove special characters, limit length)
+    cleaned = clean_query(q)
+    if cleaned and cleaned != q:
+        async def sanitized():
+            logger.info(f"Trying cleaned query: '{cleaned}'")
+            search = await call_upstream(open_video_search, cleaned, limit, deadline=deadline,
+                                         priority=priority, strategy=CLEANED)
+            with span('normalize'):
+                return normalize_results(search.result(), SEARCH_THUMBNAIL_WIDTH), search
+        attempts.append((CLEANED, sanitized))
+    
+    (items, search), strategy = await search_strategies.run(
+        normalize_query(q), attempts, accept=lambda result: bool(result[0])
+    )
+    if strategy == CLEANED and items:
+        logger.info(f"Cleaned search successful for: {cleaned}")
+    return items, search
+
+async def load_search(key: SearchKey, q: str, deadline: Optional[float] = None,
+                      priority: int = INTERACTIVE) -> list:
+    """
+    Resolve a cache miss from the shared store or upstream and fill both tiers
+    """
+    with span('store'):
+        stored = await search_store.get(key)
+    if stored is not None:
+        logger.info(f"Shared cache hit for query: {q}")
+        now = datetime.now(timezone.utc)
+        search_cache.set(
+            key, stored['items'], body=search_body(key, stored['items']),
+            ttl=min(search_cache.ttl, (stored['expires_at'] - now).total_seconds()),
+            delta=stored.get('delta', 0.0),
+            age=(now - stored['created_at']).total_seconds(),
+        )
+        return stored['items']
+    
+    return await refresh_search(key, q, deadline, priority)
+
+async def refresh_search(key: SearchKey, q: str, deadline: Optional[float] = None,
+                         priority: int = INTERACTIVE) -> list:
+    """
+    Search upstream and overwrite both cache tiers, recording the recompute cost
+    """
+    logger.info(f"Searching for videos with query: {q}")
+    started = time.monotonic()
+    try:
+        items, search = await search_upstream(q, key.limit, deadline, priority)
+    except (TypeError, AttributeError) as search_error:
+        # youtube-search-python raises these for queries it cannot parse
+        logger.warning(f"All search strategies failed for '{q}': {search_error}")
+        search_negative.record(key, type(search_error).__name__, time.monotonic() - started)
+        return []
+    delta = time.monotonic() - started
+    if search is not None:
+        search_pages.seed(key, search, items)
+    if items:
+        search_negative.discard(key)
+        with span('encode'):
+            body = search_body(key, items)
+        search_cache.set(key, items, delta=delta, body=body)
+        with span('store'):
+            await search_store.set(key, items, delta=delta)
+    else:
+        search_negative.record(key, 'empty', delta)
+    return items
+
+async def revalidate_search(key: SearchKey, q: str):
+    try:
+        await search_flights.do(key, refresh_search, key, q, None, BACKGROUND)
+    except Exception as e:
+        record_error('search_refresh', e)
+        logger.warning(f"Background refresh failed for '{q}': {e}")
+
+def search_page_one(key: SearchKey, items: list) -> dict:
+    return {
+        "items": items,
+        "nextPageToken": encode_page_token(key, 2) if items else None,
+    }
+
+SEARCH_COLUMNS = dict(
+    fields=[name for name, _ in ITEM_FIELDS], interned=('type', 'channelTitle'), prefixed=('thumbnail',),
+)
+
+def search_page_columnar(page: dict) -> dict:
+    return {**page, "items": to_columnar(page["items"], **SEARCH_COLUMNS)}
+
+def negotiated_response(content, request: Request, response: Response, columnar) -> Response:
+    """
+    Send content as JSON, MessagePack or the columnar form (built by
+    `columnar`), whichever the Accept header prefers
+    """
+    media_type = negotiate(request.headers.get('accept'))
+    response.headers['Vary'] = 'Accept'
+    with span('serialize'):
+        if media_type == JSON:
+            return trusted_json(content, response)
+        if media_type in COLUMNAR:
+            content = columnar(content)
+        return Response(render(content, media_type), media_type=media_type, headers=carried_headers(response))
+
+def search_body(key: SearchKey, items: list) -> EncodedBody:
+    """
+    Page one of key as final response bytes, pre-compressed for caching
+    """
+    return EncodedBody(dumps(search_page_one(key, items)))
+
+def cached_search_response(key: SearchKey, items: list, request: Request,
+                           response: Response) -> Response:
+    """
+    Write page one straight from the cache entry's pre-encoded JSON body
+    when items came from it: variant picked by Accept-Encoding, strong
+    ETag, Cache-Control from the entry's remaining freshness, and 304 for a
+    matching If-None-Match
+    """
+    entry = search_cache.peek(key, allow_expired=True)
+    if entry is None or entry.body is None or entry.value is not items \
+            or negotiate(request.headers.get('accept')) != JSON:
+        return negotiated_response(search_page_one(key, items), request, response, search_page_columnar)
+    
+    body = entry.body
+    content, encoding = body.select(request.headers.get('accept-encoding'))
+    headers = carried_headers(response)
+    headers['ETag'] = body.etag_for(encoding)
+    headers['Vary'] = 'Accept, Accept-Encoding'
+    fresh_for = int(entry.fresh_for)
+    headers['Cache-Control'] = f'public, max-age={fresh_for}' if fresh_for > 0 else 'no-cache'
+    if body.matches(request.headers.get('if-none-match')):
+        return Response(status_code=304, headers=headers)
+    if encoding is not None:
+        headers['Content-Encoding'] = encoding
+    return Response(content, media_type='application/json', headers=headers)
+
+async def degraded_items(key: SearchKey) -> Optional[list]:
+    """
+    Any copy of key's results still around, however old, for when upstream
+    cannot be called
+    """
+    entry = search_cache.peek(key, allow_expired=True)
+    if entry is not None:
+        return entry.value
+    stored = await search_store.get(key, allow_expired=True)
+    return stored['items'] if stored is not None else None
+
+async def first_page(key: SearchKey, q: str, response: Optional[Response] = None,
+                     deadline: Optional[float] = None) -> list:
+    """
+    Page one of key from the cache tiers or upstream. Stale or nearly expired
+    cache entries are served as-is and refreshed in the background instead
+    of on the request path; while the upstream circuit is open, expired
+    copies are served rather than failing
+    """
+    entry = search_cache.lookup(key)
+    if entry is None:
+        negative = search_negative.get(key)
+        if negative is not None:
+            logger.info(f"Known {negative.outcome} result for query: {q}")
+            if response is not None:
+                response.headers['X-Cache'] = 'NEGATIVE'
+            return []
+        try:
+            items = await search_flights.do(key, load_search, key, q, deadline)
+            cache_status = 'MISS'
+        except CircuitOpenError:
+            items = await degraded_items(key)
+            if items is None:
+                raise
+            logger.warning(f"Upstream circuit open, serving expired results for: {q}")
+            cache_status = 'DEGRADED'
+        if response is not None:
+            response.headers['X-Cache'] = cache_status
+        return items
+    
+    if key not in search_flights and entry.should_refresh(SEARCH_REFRESH_BETA):
+        spawn_background(revalidate_search(key, q))
+    if entry.is_stale:
+        logger.info(f"Stale cache hit for query: {q}")
+    else:
+        logger.info(f"Cache hit for query: {q}")
+    if response is not None:
+        response.headers['Age'] = str(int(entry.age))
+        response.headers['X-Cache'] = 'STALE' if entry.is_stale else 'HIT'
+        if entry.is_stale:
+            response.headers['X-Cache-Staleness'] = str(int(entry.staleness))
+    return entry.value
+
+async def load_page(key: SearchKey, page: int, response: Optional[Response] = None,
+                    deadline: Optional[float] = None) -> tuple:
+    """
+    Return (items, has_more) for page `page` (>= 2) of key, advancing the
+    shared continuation state with VideosSearch.next() as far as needed
+    """
+    state = search_pages.get_or_create(key)
+    if response is not None:
+        response.headers['X-Cache'] = 'HIT' if page <= len(state.pages) else 'MISS'
+    if len(state.pages) < page and not state.exhausted:
+        # Shielded so a disconnecting client cannot release the state lock
+        # while a worker thread is still advancing the VideosSearch
+        await asyncio.shield(spawn_background(fill_pages(state, page, deadline or search_deadline())))
+    if page <= len(state.pages):
+        has_more = page < len(state.pages) or not state.exhausted
+        return state.pages[page - 1], has_more
+    return [], False
+
+def pagination_query(key: SearchKey) -> str:
+    """
+    The query later pages of key are fetched with: the cleaned variant when
+    only that one answered page one
+    """
+    if search_strategies.winner_for(key.query) == CLEANED:
+        return clean_query(key.query) or key.query
+    return key.query
+
+async def reopen_search(state, deadline: float):
+    """
+    Open a new VideosSearch for state and, if pages are already held (the
+    previous search was dropped after a timeout), advance it to the last of
+    them without adding pages again
+    """
+    key = state.key
+    query = pagination_query(key)
+    logger.info(f"Reopening search for pagination: {query}")
+    search = await call_upstream(open_video_search, query, key.limit,
+                                 deadline=deadline, priority=PAGINATION, strategy='pagination')
+    if not state.pages:
+        with span('normalize'):
+            state.add_page(normalize_results(search.result(), SEARCH_THUMBNAIL_WIDTH))
+    for _ in range(len(state.pages) - 1):
+        if not await call_upstream(advance_video_search, search,
+                                   deadline=deadline, priority=PAGINATION, strategy='pagination'):
+            state.exhausted = True
+            break
+    state.search = search
+
+async def fill_pages(state, page: int, deadline: float):
+    async with state.lock:
+        while len(state.pages) < page and not state.exhausted:
+            if state.search is None:
+                # State expired, was never seeded, or its search was dropped
+                await reopen_search(state, deadline)
+            else:
+                try:
+                    advanced = await call_upstream(advance_video_search, state.search,
+                                                   deadline=deadline, priority=PAGINATION,
+                                                   strategy='pagination')
+                except TimeoutError:
+                    # The worker thread may still be mutating this VideosSearch
+                    state.search = None
+                    raise
+                if advanced:
+                    with span('normalize'):
+                        state.add_page(normalize_results(state.search.result(), SEARCH_THUMBNAIL_WIDTH))
+                else:
+                    state.exhausted = True
 
 @api_router.get("/search/videos")
-async def search_videos(q: str = Query(..., description="Search query")):
+async def search_videos(
+    request: Request,
+    response: Response,
+    q: str = Query(..., description="Search query"),
+    limit: int = Query(10, ge=1, le=50, description="Results per page"),
+    page_token: Optional[str] = Query(None, description="nextPageToken from a previous response"),
+):
     """
     Search YouTube videos without API key using youtube-search-python
     """
+    deadline = search_deadline()
+    if page_token:
+        try:
+            key, page = decode_page_token(page_token)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        state = search_pages.get(key)
+        if page > max(len(state.pages) + 1 if state else 0, SEARCH_PAGE_MAX_RESUME):
+            raise HTTPException(status_code=400, detail="Page token is too far ahead; start again from page one")
+    
     try:
+        if page_token:
+            # Everything about a token-derived key comes from the token (its
+            # query, not q), so a token cannot put one query's results
+            # under another query's key
+            items, has_more = await load_page(key, page, response, deadline)
+            next_token = encode_page_token(key, page + 1) if has_more else None
+            return negotiated_response({"items": items, "nextPageToken": next_token},
+                                       request, response, search_page_columnar)
+        
         if not q or q.strip() == "":
             return {"items": []}
         
-        logger.info(f"Searching for videos with query: {q}")
-        
-        # Try different search approaches for problematic queries
-        items = []
-        
-        # First try: Direct search
-        try:
-            videos_search = VideosSearch(q, limit=10)
-            results = videos_search.result()
-            logger.info(f"Direct search successful for query: {q}")
-            
-            # Transform results to match frontend format with proper None handling
-            if results and 'result' in results and results['result']:
-                for video in results['result']:
-                    if video is None:
-                        continue
-                    
-                    # Safely extract channel name
-                    channel_name = ''
-                    if video.get('channel') and isinstance(video.get('channel'), dict):
-                        channel_name = video['channel'].get('name', '') or ''
-                    
-                    # Safely extract thumbnail URL
-                    thumbnail_url = ''
-                    thumbnails = video.get('thumbnails')
-                    if thumbnails and isinstance(thumbnails, list) and len(thumbnails) > 0:
-                        first_thumbnail = thumbnails[0]
-                        if first_thumbnail and isinstance(first_thumbnail, dict):
-                            thumbnail_url = first_thumbnail.get('url', '') or ''
-                    
-                    # Safely extract description
-                    description_text = ''
-                    description_snippet = video.get('descriptionSnippet')
-                    if description_snippet and isinstance(description_snippet, list) and len(description_snippet) > 0:
-                        first_desc = description_snippet[0]
-                        if first_desc and isinstance(first_desc, dict):
-                            description_text = first_desc.get('text', '') or ''
-                    
-                    items.append({
-                        'id': video.get('id', '') or '',
-                        'type': 'video',
-                        'title': video.get('title', '') or '',
-                        'channelTitle': channel_name,
-                        'thumbnail': thumbnail_url,
-                        'description': description_text
-                    })
-        
-        except (TypeError, AttributeError) as search_error:
-            logger.warning(f"Direct search failed for '{q}': {search_error}")
-            
-            # Second try: Modified query (remove special characters, limit length)
-            try:
-                # Clean the query - remove special characters and limit length
-                clean_query = ''.join(c for c in q if c.isalnum() or c.isspace()).strip()[:50]
-                if clean_query and clean_query != q:
-                    logger.info(f"Trying cleaned query: '{clean_query}'")
-                    videos_search = VideosSearch(clean_query, limit=5)
-                    results = videos_search.result()
-                    
-                    if results and 'result' in results and results['result']:
-                        logger.info(f"Cleaned search successful for: {clean_query}")
-                        # Process results same as above but with fewer items
-                        for video in results['result'][:5]:
-                            if video is None:
-                                continue
-                            
-                            items.append({
-                                'id': video.get('id', '') or '',
-                                'type': 'video', 
-                                'title': video.get('title', '') or '',
-                                'channelTitle': video.get('channel', {}).get('name', '') if video.get('channel') else '',
-                                'thumbnail': video.get('thumbnails', [{}])[0].get('url', '') if video.get('thumbnails') else '',
-                                'description': video.get('descriptionSnippet', [{}])[0].get('text', '') if video.get('descriptionSnippet') else ''
-                            })
-                            
-            except Exception as clean_error:
-                logger.warning(f"Cleaned search also failed: {clean_error}")
-        
-        return {"items": items}
+        key = SearchKey(normalize_query(q), limit, SEARCH_LOCALE)
+        items = await first_page(key, q, response, deadline)
+        return cached_search_response(key, items, request, response)
     
     except Exception as e:
+        record_error('search', e)
         logger.error(f"Error searching videos: {str(e)}")
+        if isinstance(e, CircuitOpenError):
+            response.headers['Retry-After'] = str(math.ceil(e.retry_after))
         return {"items": [], "error": str(e)}
 
+def stream_event(fmt: str, event: str, data: dict) -> str:
+    if fmt == "sse":
+        return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+    return json.dumps({"type": event, **data}) + "\n"
+
+async def stream_search(key: SearchKey, q: str, pages: int, fmt: str):
+    """
+    Yield each item as soon as its page arrives, then one event per page and
+    a final summary. The next page is fetched while the current one is
+    being written out; if the client goes away that fetch still completes
+    into the shared cache/pagination state
+    """
+    started = time.monotonic()
+    first_item_ms = None
+    count = 0
+    pages_sent = 0
+    errors = []
+    if not key.query:
+        pages = 0
+    
+    async def fetch(page):
+        if page == 1:
+            items = await first_page(key, q, deadline=search_deadline())
+            return items, bool(items)
+        return await load_page(key, page, deadline=search_deadline())
+    
+    pending = asyncio.ensure_future(fetch(1)) if pages else None
+    for page in range(1, pages + 1):
+        try:
+            items, has_more = await pending
+        except Exception as e:
+            record_error('search_stream', e)
+            logger.warning(f"Streaming search failed on page {page} for '{q}': {e}")
+            errors.append({"page": page, "error": str(e)})
+            break
+        
+        more = has_more and page < pages
+        if more:
+            pending = asyncio.ensure_future(fetch(page + 1))
+        
+        for item in items:
+            if first_item_ms is None:
+                first_item_ms = round((time.monotonic() - started) * 1000, 1)
+            count += 1
+            yield stream_event(fmt, "item", {"page": page, "item": item})
+        pages_sent += 1
+        yield stream_event(fmt, "page", {
+            "page": page,
+            "count": len(items),
+            "nextPageToken": encode_page_token(key, page + 1) if has_more else None,
+        })
+        if not more:
+            break
+    
+    yield stream_event(fmt, "summary", {
+        "count": count,
+        "pages": pages_sent,
+        "errors": errors,
+        "first_item_ms": first_item_ms,
+        "elapsed_ms": round((time.monotonic() - started) * 1000, 1),
+    })
+
+@api_router.get("/search/videos/stream")
+async def search_videos_stream(
+    q: str = Query(..., description="Search query"),
+    limit: int = Query(10, ge=1, le=50, description="Results per page"),
+    pages: int = Query(1, ge=1, le=10, description="Number of pages to stream"),
+    format: str = Query("ndjson", pattern="^(ndjson|sse)$", description="ndjson or sse"),
+):
+    """
+    Streaming variant of /search/videos: results are written as NDJSON lines
+    or Server-Sent Events as they become available
+    """
+    key = SearchKey(normalize_query(q), limit, SEARCH_LOCALE)
+    media_type = "text/event-stream" if format == "sse" else "application/x-ndjson"
+    return StreamingResponse(
+        stream_search(key, q, pages, format),
+        media_type=media_type,
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+@api_router.post("/search/batch")
+async def search_batch(input: BatchSearchRequest):
+    """
+    Run several searches in one request with bounded concurrency, returning
+    per-query results, errors and timings in request order
+    """
+    started = time.monotonic()
+    semaphore = asyncio.Semaphore(SEARCH_BATCH_CONCURRENCY)
+    
+    async def run_one(query: BatchSearchQuery) -> dict:
+        result = {"q": query.q, "limit": query.limit, "items": [], "nextPageToken": None}
+        async with semaphore:
+            query_started = time.monotonic()
+            # Each query gets the full budget from when it starts: a deadline
+            # shared by the whole batch would time out the queued queries and
+            # count those timeouts against the upstream circuit breaker
+            deadline = search_deadline()
+            try:
+                if query.q.strip():
+                    key = SearchKey(normalize_query(query.q), query.limit, SEARCH_LOCALE)
+                    status = Response()
+                    items = await first_page(key, query.q, status, deadline)
+                    result.update(search_page_one(key, items))
+                    result["cache"] = status.headers.get('X-Cache')
+            except Exception as e:
+                record_error('search_batch', e)
+                logger.warning(f"Batch search failed for '{query.q}': {e}")
+                result["error"] = str(e)
+            result["elapsed_ms"] = round((time.monotonic() - query_started) * 1000, 1)
+        return result
+    
+    results = await asyncio.gather(*(run_one(query) for query in input.queries))
+    return trusted_json({
+        "results": results,
+        "elapsed_ms": round((time.monotonic() - started) * 1000, 1),
+    })
+
+async def warm_query(q: str) -> bool:
+    """
+    Make sure q will stay cached until the next warm-up cycle. Returns False
+    if nothing had to be done
+    """
+    key = SearchKey(normalize_query(q), 10, SEARCH_LOCALE)
+    entry = search_cache.peek(key)
+    if entry is None:
+        await search_flights.do(key, load_search, key, q, None, BACKGROUND)
+    elif entry.fresh_for <= max(cache_warmer.interval, 0):
+        await search_flights.do(key, refresh_search, key, q, None, BACKGROUND)
+    else:
+        return False
+    return True
+
+# Pre-fetch hot queries (Home.jsx loads 'gaming' on every visit) in the background
+cache_warmer = CacheWarmer(
+    queries=os.environ.get('SEARCH_WARM_QUERIES', 'gaming').split(','),
+    warm=warm_query,
+    delay=float(os.environ.get('SEARCH_WARM_DELAY', '1.0')),
+    interval=float(os.environ.get('SEARCH_WARM_INTERVAL', '240')),
+)
+
+@api_router.get("/ready")
+async def readiness():
+    """
+    Readiness probe. The app serves immediately; cache warm-up and data
+    migration progress is reported for dashboards and deploy tooling
+    """
+    return {
+        "ready": True,
+        "warmup": cache_warmer.progress(),
+        "status_migration": status_migration.progress(),
+        "status_buffer": status_buffer.stats() if status_buffer is not None else None,
+        "status_archive": status_archiver.progress() if status_archiver is not None else None,
+    }
+
+@api_router.get("/search/stats")
+async def search_stats():
+    """
+    Saturation and throughput counters for the search pipeline
+    """
+    return {
+        "executor": search_executor.stats(),
+        "scheduler": upstream_scheduler.stats(),
+        "breaker": upstream_breaker.stats(),
+        "strategies": search_strategies.stats(),
+        "negative": search_negative.stats(),
+        "cache": search_cache.stats(),
+        "store": search_store.stats(),
+        "coalescing": search_flights.stats(),
+        "pagination": search_pages.stats(),
+    }
+
+def cache_lookups():
+    cache = search_cache.stats()
+    store = search_store.stats()
+    return [
+        (('memory', 'hit'), cache['hits']),
+        (('memory', 'stale_hit'), cache['stale_hits']),
+        (('memory', 'miss'), cache['misses']),
+        (('store', 'hit'), store['hits']),
+        (('store', 'miss'), store['misses']),
+        (('negative', 'short_circuit'), search_negative.short_circuits),
+    ]
+
+metrics.collected('search_cache_lookups_total', 'Search cache lookups by tier and result',
+                  cache_lookups, ('tier', 'result'), kind='counter')
+metrics.collected('search_cache_hit_ratio', 'Share of search cache lookups served from the tier',
+                  lambda: [(('memory',), search_cache.stats()['hit_ratio']),
+                           (('store',), search_store.stats()['hit_ratio'])], ('tier',))
+metrics.collected('search_executor_queue_depth', 'Upstream searches waiting for an executor thread',
+                  lambda: [((), search_executor.queue_depth)])
+metrics.collected('search_executor_active', 'Executor threads running an upstream search',
+                  lambda: [((), search_executor.stats()['active'])])
+metrics.collected('search_executor_rejected_total', 'Upstream searches rejected by a full executor queue',
+                  lambda: [((), search_executor.stats()['rejected'])], kind='counter')
+metrics.collected('upstream_scheduler_queued', 'Upstream calls waiting for a rate-limit slot by priority',
+                  lambda: [((name,), wait['queued'])
+                           for name, wait in upstream_scheduler.stats()['queue_wait'].items()], ('priority',))
+metrics.collected('upstream_circuit_open', '1 while the upstream circuit breaker is open',
+                  lambda: [((), int(upstream_breaker.state == CircuitBreaker.OPEN))])
+if status_buffer is not None:
+    metrics.collected('status_buffer_pending', 'Status checks waiting in the write-behind buffer',
+                      lambda: [((), status_buffer.stats()['pending'])])
+
+@api_router.get("/metrics")
+async def prometheus_metrics():
+    """
+    Metrics for this worker process in the Prometheus text format
+    """
+    return Response(metrics.render(), media_type=METRICS_CONTENT_TYPE)
+
 # Include the router in the main app
 app.include_router(api_router)
 
@@ -169,8 +1061,20 @@ app.add_middleware(
     allow_origins=os.environ.get('CORS_ORIGINS', '*').split(','),
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],
 )
 
+# Server-Timing header (and optional JSON timing log line) on a sample of requests
+app.add_middleware(
+    ServerTimingMiddleware,
+    sample_rate=float(os.environ.get('SERVER_TIMING_SAMPLE', '1.0')),
+    log=os.environ.get('SERVER_TIMING_LOG', '0') == '1',
+    allow_origins=os.environ.get('CORS_ORIGINS', '*').split(','),
+)
+
+# Outermost, so request latency includes every other middleware
+app.add_middleware(MetricsMiddleware, histogram=http_request_seconds, errors=errors_total)
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
@@ -178,6 +1082,41 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+@app.on_event("startup")
+async def startup_db_client():
+    cache_warmer.start()
+    try:
+        await search_store.ensure_indexes()
+    except Exception as e:
+        logger.warning(f"Could not create search_cache indexes: {e}")
+    try:
+        await ensure_status_indexes(db.status_checks)
+    except Exception as e:
+        logger.warning(f"Could not create status_checks indexes: {e}")
+    if status_archiver is not None:
+        # Creates the TTL index once everything due has been archived
+        status_archiver.start()
+    else:
+        try:
+            await ensure_retention_index(db, db.status_checks, STATUS_RETENTION_DAYS * 86400)
+        except Exception as e:
+            logger.warning(f"Could not apply status_checks retention index: {e}")
+    if status_rollups is not None:
+        try:
+            await status_rollups.ensure_indexes()
+        except Exception as e:
+            logger.warning(f"Could not create status rollup indexes: {e}")
+    status_migration.start()
+    if status_buffer is not None:
+        status_buffer.start()
+
 @app.on_event("shutdown")
 async def shutdown_db_client():
+    await cache_warmer.stop()
+    await status_migration.stop()
+    if status_archiver is not None:
+        await status_archiver.stop()
+    if status_buffer is not None:
+        await status_buffer.close()
+    search_executor.shutdown()
     client.close()
\ No newline at end of file
@@ -0,0 +1,149 @@
+"""
+Per-request timing breakdown reported in the Server-Timing response header
+and, optionally, one structured log line per request
+"""
+import json
+import logging
+import random
+import time
+from contextvars import ContextVar
+from typing import Dict, Optional, Sequence, Tuple
+
+from starlette.datastructures import MutableHeaders
+
+logger = logging.getLogger(__name__)
+
+
+class RequestTiming:
+    """
+    Total seconds and count per span name for one request. Spans recorded
+    by tasks the request started (single-flight leaders, hedged searches)
+    land here too, since tasks inherit the request's context
+    """
+
+    __slots__ = ('started', 'spans')
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.spans: Dict[str, Tuple[float, int]] = {}
+
+    def add(self, name: str, seconds: float):
+        total, count = self.spans.get(name, (0.0, 0))
+        self.spans[name] = (total + seconds, count + 1)
+
+    def header(self, total: float) -> str:
+        entries = [f'{name};dur={seconds * 1000:.1f}' for name, (seconds, _) in self.spans.items()]
+        entries.append(f'total;dur={total * 1000:.1f}')
+        return ', '.join(entries)
+
+
+_current: ContextVar[Optional[RequestTiming]] = ContextVar('request_timing', default=None)
+
+
+class _Span:
+    __slots__ = ('timing', 'name', 'started')
+
+    def __init__(self, timing: RequestTiming, name: str):
+        self.timing = timing
+        self.name = name
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.timing.add(self.name, time.perf_counter() - self.started)
+
+
+class _NoSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        pass
+
+
+_NO_SPAN = _NoSpan()
+
+
+def span(name: str):
+    """
+    `with span('normalize'):` adds the block's duration to the current
+    request's `name` span. A shared no-op when the request is not sampled
+    """
+    timing = _current.get()
+    if timing is None:
+        return _NO_SPAN
+    return _Span(timing, name)
+
+
+def record(name: str, seconds: float):
+    """
+    Add a duration measured elsewhere to the current request's `name` span
+    """
+    timing = _current.get()
+    if timing is not None:
+        timing.add(name, seconds)
+
+
+class ServerTimingMiddleware:
+    """
+    Pure ASGI middleware that times a `sample_rate` share of HTTP requests.
+    Spans recorded until the response headers are sent go into a
+    Server-Timing header, with `total` being the time to headers; with
+    `log` set, a JSON line with every span, the status and the full
+    duration (including streamed bodies) is logged when the request ends.
+    `allow_origins` are sent as Timing-Allow-Origin so cross-origin pages
+    can read the timings in the browser
+    """
+
+    def __init__(self, app, sample_rate: float = 1.0, log: bool = False,
+                 allow_origins: Sequence[str] = ()):
+        self.app = app
+        self.sample_rate = sample_rate
+        self.log = log
+        self.allow_origin = ', '.join(allow_origins) or None
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http' or random.random() >= self.sample_rate:
+            await self.app(scope, receive, send)
+            return
+
+        timing = RequestTiming()
+        token = _current.set(timing)
+        status = 500
+        headers_sent_after = None
+
+        async def send_with_timing(message):
+            nonlocal status, headers_sent_after
+            if message['type'] == 'http.response.start':
+                status = message['status']
+                headers_sent_after = time.perf_counter() - timing.started
+                message.setdefault('headers', [])
+                headers = MutableHeaders(scope=message)
+                headers.append('Server-Timing', timing.header(headers_sent_after))
+                if self.allow_origin is not None:
+                    headers.append('Timing-Allow-Origin', self.allow_origin)
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _current.reset(token)
+            if self.log:
+                self._log(scope, timing, status, headers_sent_after)
+
+    def _log(self, scope, timing: RequestTiming, status: int, headers_sent_after: Optional[float]):
+        logger.info(json.dumps({
+            "method": scope['method'],
+            "route": getattr(scope.get('route'), 'path', None) or scope['path'],
+            "status": status,
+            "total_ms": round((time.perf_counter() - timing.started) * 1000, 1),
+            "headers_ms": round(headers_sent_after * 1000, 1) if headers_sent_after is not None else None,
+            "spans": {
+                name: {"ms": round(seconds * 1000, 1), "count": count}
+                for name, (seconds, count) in timing.spans.items()
+            },
+        }))
@@ -0,0 +1,53 @@
+"""
+Request coalescing: concurrent calls with the same key share one execution
+"""
+import asyncio
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class SingleFlight:
+    """
+    The first caller for a key (the leader) starts fn as a task; callers that
+    arrive while it is running (followers) await the same task.
+
+    Every caller awaits the task through asyncio.shield, so a disconnecting
+    caller - leader or follower - only cancels its own wait, never the shared
+    work. An exception raised by fn is delivered to every caller, and the key
+    is released as soon as the task finishes so failures are not memoized.
+    """
+
+    def __init__(self):
+        self._inflight: dict = {}
+        self.leaders = 0
+        self.followers = 0
+
+    async def do(self, key, fn, *args, **kwargs):
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(fn(*args, **kwargs))
+            self._inflight[key] = task
+            task.add_done_callback(lambda t: self._release(key, t))
+            self.leaders += 1
+        else:
+            self.followers += 1
+        return await asyncio.shield(task)
+
+    def _release(self, key, task):
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        # Retrieve the exception so a failure nobody is waiting for anymore
+        # is not reported as "never retrieved"
+        if not task.cancelled() and task.exception() is not None:
+            logger.debug(f"Coalesced call for {key!r} failed: {task.exception()!r}")
+
+    def __contains__(self, key):
+        return key in self._inflight
+
+    def stats(self) -> dict:
+        return {
+            "inflight": len(self._inflight),
+            "leaders": self.leaders,
+            "followers": self.followers,
+        }
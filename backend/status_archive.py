@@ -0,0 +1,230 @@
+"""
+Cold archive of old status checks as gzipped, date-partitioned NDJSON files
+"""
+import asyncio
+import gzip
+import json
+import logging
+import os
+import socket
+import tempfile
+import time
+import uuid
+from datetime import date, datetime, time as dt_time, timedelta, timezone
+from pathlib import Path
+from typing import Awaitable, Callable, Iterator, List, Optional
+
+from pymongo.errors import DuplicateKeyError
+
+from status_checks import STATUS_SORT, parse_timestamp
+
+# Lock document in `locks` naming the one process allowed to archive
+ARCHIVE_LEASE_ID = 'status_archive'
+
+logger = logging.getLogger(__name__)
+
+
+class StatusArchiver:
+    """
+    Copies every whole UTC day of status checks into
+    `directory`/YYYY/MM/DD.ndjson.gz once the day ended more than
+    `retention_days - lead_days` days ago, and rechecks every `interval`
+    seconds. The `retention_days` TTL index starts deleting a day's
+    documents `retention_days` after the day began, so `lead_days` must be
+    at least one day plus `interval` for every day to be archived before
+    any of it expires, and less than `retention_days`.
+
+    Files are written under a per-process temporary name and renamed, so a
+    day either has a complete archive file or none; days that already have
+    one are skipped. With `locks` (a collection), only the process holding
+    a lease document there archives, so several workers sharing the
+    directory do not archive the same day at once; the lease expires
+    `lease` seconds after its holder last renewed it.
+
+    `on_archived` is awaited after every successful run. Use it to create
+    the TTL index, so enabling retention on a collection full of old
+    documents archives them before anything is deleted.
+    """
+
+    def __init__(self, collection, directory: str, retention_days: float,
+                 lead_days: float = 2.0, interval: float = 3600.0, batch_size: int = 1000,
+                 on_archived: Optional[Callable[[], Awaitable]] = None,
+                 locks=None, lease: float = 600.0):
+        if lead_days < 1 + interval / 86400:
+            raise ValueError(
+                f"Archive lead of {lead_days:g} days must be at least one day plus the "
+                f"{interval:g}s archive interval, or days expire before they are archived"
+            )
+        if lead_days >= retention_days:
+            raise ValueError(
+                f"Archive lead of {lead_days:g} days must be shorter than the "
+                f"{retention_days:g} day retention"
+            )
+        self.collection = collection
+        self.on_archived = on_archived
+        self.directory = Path(directory)
+        self.retention_days = retention_days
+        self.lead_days = lead_days
+        self.interval = interval
+        self.batch_size = batch_size
+        self.locks = locks
+        self.lease = lease
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self.leader = locks is None
+        self._task: Optional[asyncio.Task] = None
+        self.archived_days = 0
+        self.archived_docs = 0
+        self.last_run_at: Optional[float] = None
+        self.error: Optional[str] = None
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self):
+        while True:
+            try:
+                if await self.acquire_lease():
+                    await self.archive_due()
+                    if self.on_archived is not None:
+                        await self.on_archived()
+                self.error = None
+            except Exception as e:
+                self.error = str(e)
+                logger.warning(f"Status archive run failed: {e}")
+            self.last_run_at = time.time()
+            await asyncio.sleep(self.interval)
+
+    def path_for(self, day: date) -> Path:
+        return self.directory / f"{day:%Y}" / f"{day:%m}" / f"{day:%d}.ndjson.gz"
+
+    async def acquire_lease(self) -> bool:
+        """
+        Take or renew the archiving lease; False while another process
+        holds it
+        """
+        if self.locks is None:
+            return True
+        now = datetime.now(timezone.utc)
+        try:
+            await self.locks.update_one(
+                {'_id': ARCHIVE_LEASE_ID, '$or': [{'owner': self.owner}, {'expires_at': {'$lte': now}}]},
+                {'$set': {'owner': self.owner, 'expires_at': now + timedelta(seconds=self.lease)}},
+                upsert=True,
+            )
+        except DuplicateKeyError:
+            # Held by someone else: the upsert tried to insert a second lease
+            self.leader = False
+            return False
+        self.leader = True
+        return True
+
+    def is_due(self, day: date) -> bool:
+        """
+        Whether day ended at least retention_days - lead_days days ago
+        """
+        day_end = datetime.combine(day + timedelta(days=1), dt_time.min, tzinfo=timezone.utc)
+        return day_end <= datetime.now(timezone.utc) - timedelta(days=self.retention_days - self.lead_days)
+
+    async def archive_due(self):
+        oldest = await self.collection.find(
+            {'timestamp': {'$type': 'date'}}, {'_id': 0, 'timestamp': 1}
+        ).sort(STATUS_SORT).limit(1).to_list(1)
+        if not oldest:
+            return
+        day = parse_timestamp(oldest[0]['timestamp']).date()
+        while self.is_due(day):
+            if not self.path_for(day).exists():
+                if not await self.acquire_lease():
+                    return
+                await self.archive_day(day)
+            day += timedelta(days=1)
+
+    async def archive_day(self, day: date) -> int:
+        start = datetime.combine(day, dt_time.min, tzinfo=timezone.utc)
+        query = {'timestamp': {'$gte': start, '$lt': start + timedelta(days=1)}}
+        path = self.path_for(day)
+        await asyncio.to_thread(path.parent.mkdir, parents=True, exist_ok=True)
+        fd, tmp_path = await asyncio.to_thread(
+            tempfile.mkstemp, dir=path.parent, prefix=path.name + '.', suffix='.tmp'
+        )
+        os.close(fd)
+        try:
+            count = await self._write_day(query, tmp_path)
+            await asyncio.to_thread(os.replace, tmp_path, path)
+        except BaseException:
+            await asyncio.to_thread(_remove_quietly, tmp_path)
+            raise
+        self.archived_days += 1
+        self.archived_docs += count
+        logger.info(f"Archived {count} status checks for {day} to {path}")
+        return count
+
+    async def _write_day(self, query: dict, tmp_path: str) -> int:
+        archive = await asyncio.to_thread(gzip.open, tmp_path, 'wt', encoding='utf-8')
+        count = 0
+        try:
+            cursor = self.collection.find(query, {'_id': 0}).sort(STATUS_SORT).batch_size(self.batch_size)
+            lines: List[str] = []
+            async for doc in cursor:
+                doc['timestamp'] = parse_timestamp(doc['timestamp']).isoformat()
+                lines.append(json.dumps(doc) + "\n")
+                if len(lines) >= self.batch_size:
+                    await asyncio.to_thread(archive.writelines, lines)
+                    count += len(lines)
+                    lines = []
+            await asyncio.to_thread(archive.writelines, lines)
+            count += len(lines)
+        finally:
+            await asyncio.to_thread(archive.close)
+        return count
+
+    def days(self) -> List[dict]:
+        """
+        Archived days, oldest first, with their compressed size
+        """
+        result = []
+        for path in sorted(self.directory.glob('*/*/*.ndjson.gz')):
+            year, month = path.parent.parent.name, path.parent.name
+            result.append({
+                "date": f"{year}-{month}-{path.name[:2]}",
+                "bytes": path.stat().st_size,
+            })
+        return result
+
+    def read_day(self, day: date) -> Iterator[dict]:
+        """
+        Blocking iterator over one archived day's status checks; raises
+        FileNotFoundError if the day was not archived
+        """
+        with gzip.open(self.path_for(day), 'rt', encoding='utf-8') as archive:
+            for line in archive:
+                yield json.loads(line)
+
+    def progress(self) -> dict:
+        return {
+            "directory": str(self.directory),
+            "retention_days": self.retention_days,
+            "lead_days": self.lead_days,
+            "leader": self.leader,
+            "archived_days": self.archived_days,
+            "archived_docs": self.archived_docs,
+            "last_run_at": self.last_run_at,
+            "error": self.error,
+        }
+
+
+def _remove_quietly(path: str):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
@@ -0,0 +1,141 @@
+"""
+Write-behind buffer batching single status check inserts
+"""
+import asyncio
+import logging
+import time
+from typing import List, Optional
+
+from pymongo.errors import BulkWriteError
+from pymongo.write_concern import WriteConcern
+
+logger = logging.getLogger(__name__)
+
+DUPLICATE_KEY = 11000
+
+
+class StatusBuffer:
+    """
+    Collects documents and writes them with one unordered insert_many per
+    batch, as soon as `max_batch` documents are waiting or `flush_interval`
+    seconds after the first one arrived, whichever comes first.
+
+    Writes use acknowledged write concern (w=1). A failed batch is kept and
+    retried on the next flush. At most `max_pending` documents are held
+    (waiting or being written); add() blocks beyond that, so a slow
+    MongoDB slows writers down instead of growing memory without bound.
+    """
+
+    def __init__(self, collection, max_batch: int = 500, flush_interval: float = 0.05,
+                 max_pending: int = 10000, retry_delay: float = 1.0):
+        self.collection = collection.with_options(write_concern=WriteConcern(w=1))
+        self.max_batch = max_batch
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self.retry_delay = retry_delay
+        self._docs: List[dict] = []
+        self._space = asyncio.Semaphore(max_pending)
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self.added = 0
+        self.written = 0
+        self.failed = 0
+        self.batches = 0
+        self.retries = 0
+        self.blocked = 0
+        self.last_flush_ms = 0.0
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def add(self, doc: dict):
+        """
+        Queue doc for writing; waits only while max_pending documents are
+        already held
+        """
+        if self._space.locked():
+            self.blocked += 1
+        await self._space.acquire()
+        self._docs.append(doc)
+        self.added += 1
+        if len(self._docs) >= self.max_batch:
+            self._wakeup.set()
+        elif len(self._docs) == 1:
+            asyncio.get_running_loop().call_later(self.flush_interval, self._wakeup.set)
+
+    async def _run(self):
+        while True:
+            await self._wakeup.wait()
+            self._wakeup.clear()
+            while self._docs:
+                if not await self.flush_batch():
+                    await asyncio.sleep(self.retry_delay)
+
+    async def flush_batch(self) -> bool:
+        """
+        Write up to max_batch waiting documents. Returns False if the batch
+        could not be written and was put back
+        """
+        batch = self._docs[:self.max_batch]
+        del self._docs[:self.max_batch]
+        started = time.monotonic()
+        try:
+            await self.collection.insert_many(batch, ordered=False)
+        except asyncio.CancelledError:
+            self._docs[:0] = batch
+            raise
+        except BulkWriteError as e:
+            # Unordered: everything except the reported documents was written.
+            # Duplicate keys mean an earlier, failed-looking attempt landed
+            errors = [error for error in e.details.get('writeErrors', [])
+                      if error.get('code') != DUPLICATE_KEY]
+            self.failed += len(errors)
+            self.written += len(batch) - len(errors)
+            if errors:
+                logger.warning(f"Buffered status insert dropped {len(errors)} of {len(batch)} documents")
+        except Exception as e:
+            self._docs[:0] = batch
+            self.retries += 1
+            logger.warning(f"Buffered status insert of {len(batch)} documents failed, retrying: {e}")
+            return False
+        else:
+            self.written += len(batch)
+        self.batches += 1
+        self.last_flush_ms = round((time.monotonic() - started) * 1000, 1)
+        for _ in batch:
+            self._space.release()
+        return True
+
+    async def close(self, timeout: float = 10.0):
+        """
+        Stop the background flusher and write out everything still held,
+        giving up after timeout seconds
+        """
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        deadline = time.monotonic() + timeout
+        while self._docs and time.monotonic() < deadline:
+            if not await self.flush_batch():
+                await asyncio.sleep(min(self.retry_delay, max(deadline - time.monotonic(), 0)))
+        if self._docs:
+            logger.error(f"Shutting down with {len(self._docs)} buffered status checks unwritten")
+
+    def stats(self) -> dict:
+        return {
+            "pending": len(self._docs),
+            "max_pending": self.max_pending,
+            "max_batch": self.max_batch,
+            "added": self.added,
+            "written": self.written,
+            "failed": self.failed,
+            "batches": self.batches,
+            "retries": self.retries,
+            "blocked": self.blocked,
+            "last_flush_ms": self.last_flush_ms,
+        }
@@ -0,0 +1,300 @@
+"""
+Queries and indexes for the status_checks collection
+"""
+import asyncio
+import base64
+import json
+import logging
+from datetime import datetime, timezone
+from typing import Optional, Tuple, Union
+
+from pymongo import UpdateOne
+from pymongo.errors import PyMongoError
+
+logger = logging.getLogger(__name__)
+
+# Keyset order of GET /api/status: oldest first, id breaks timestamp ties
+STATUS_SORT = [('timestamp', 1), ('id', 1)]
+
+
+def parse_timestamp(value: Union[str, datetime]) -> datetime:
+    """
+    Stored timestamp as an aware UTC datetime. Documents written before
+    timestamps became BSON dates hold ISO strings until migrated
+    """
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+
+
+def encode_status_cursor(timestamp: Union[str, datetime], id: str) -> str:
+    """
+    Opaque cursor pointing just past the status check (timestamp, id), as
+    stored: a legacy string timestamp stays a string so the cursor keeps
+    its place in MongoDB's sort order, where all strings precede all dates
+    """
+    if isinstance(timestamp, str):
+        value = ['s', timestamp, id]
+    else:
+        value = ['d', parse_timestamp(timestamp).isoformat(), id]
+    raw = json.dumps(value, separators=(',', ':'))
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_status_cursor(cursor: str) -> Tuple[Union[str, datetime], str]:
+    """
+    Inverse of encode_status_cursor; raises ValueError for malformed cursors
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        kind, timestamp, id = json.loads(raw)
+        if not isinstance(timestamp, str) or not isinstance(id, str) or kind not in ('s', 'd'):
+            raise ValueError
+        if kind == 'd':
+            timestamp = parse_timestamp(timestamp)
+    except Exception:
+        raise ValueError("Invalid cursor")
+    return timestamp, id
+
+
+def status_page_filter(client_name: Optional[str] = None, after: Optional[str] = None,
+                       since: Optional[datetime] = None, until: Optional[datetime] = None) -> dict:
+    """
+    Filter selecting the status checks that follow cursor `after` in
+    STATUS_SORT order, optionally for one client only and within
+    [since, until)
+    """
+    clauses = []
+    if client_name is not None:
+        clauses.append({'client_name': client_name})
+    if since is not None or until is not None:
+        window = {}
+        if since is not None:
+            window['$gte'] = since
+        if until is not None:
+            window['$lt'] = until
+        clauses.append({'timestamp': window})
+    if after is not None:
+        timestamp, id = decode_status_cursor(after)
+        following = [
+            {'timestamp': {'$gt': timestamp}},
+            {'timestamp': timestamp, 'id': {'$gt': id}},
+        ]
+        if isinstance(timestamp, str):
+            # Comparisons are type-bracketed; dates sort after every string
+            following.append({'timestamp': {'$type': 'date'}})
+        clauses.append({'$or': following})
+    if not clauses:
+        return {}
+    return clauses[0] if len(clauses) == 1 else {'$and': clauses}
+
+
+async def ensure_status_indexes(collection):
+    """
+    Indexes backing keyset pagination, overall and per client
+    """
+    await collection.create_index(STATUS_SORT, name='timestamp_id')
+    await collection.create_index(
+        [('client_name', 1)] + STATUS_SORT, name='client_name_timestamp_id'
+    )
+
+
+# Time bucket sizes of GET /api/status/stats, as $dateTrunc units
+BUCKET_UNITS = ('minute', 'hour', 'day')
+
+
+def truncate_timestamp(timestamp: datetime, unit: str) -> datetime:
+    """
+    Start of the `unit` bucket containing timestamp, like $dateTrunc in UTC
+    """
+    timestamp = parse_timestamp(timestamp).replace(second=0, microsecond=0)
+    if unit in ('hour', 'day'):
+        timestamp = timestamp.replace(minute=0)
+    if unit == 'day':
+        timestamp = timestamp.replace(hour=0)
+    return timestamp
+
+
+def status_stats_pipeline(unit: str, client_name: Optional[str] = None,
+                          since: Optional[datetime] = None, until: Optional[datetime] = None) -> list:
+    """
+    Aggregation counting status checks per client per `unit` bucket. The
+    $match uses the timestamp indexes; documents still holding legacy
+    string timestamps are skipped
+    """
+    match = status_page_filter(client_name, since=since, until=until)
+    match = {'$and': [match, {'timestamp': {'$type': 'date'}}]} if match else {'timestamp': {'$type': 'date'}}
+    return [
+        {'$match': match},
+        {'$group': {
+            '_id': {
+                'client_name': '$client_name',
+                'bucket': {'$dateTrunc': {'date': '$timestamp', 'unit': unit}},
+            },
+            'count': {'$sum': 1},
+        }},
+        {'$project': {'_id': 0, 'bucket': '$_id.bucket', 'client_name': '$_id.client_name', 'count': 1}},
+        {'$sort': {'bucket': 1, 'client_name': 1}},
+    ]
+
+
+class StatusRollups:
+    """
+    Pre-aggregated status check counts, one collection per bucket unit
+    (status_rollups_minute, ...) holding {client_name, bucket, count}.
+
+    record() is called on every insert and upserts the matching buckets
+    with $inc, so reading stats never touches status_checks. Only inserts
+    made while rollups are enabled are counted.
+    """
+
+    def __init__(self, db, units=BUCKET_UNITS):
+        self.collections = {unit: db[f'status_rollups_{unit}'] for unit in units}
+        self.recorded = 0
+        self.failed = 0
+
+    async def ensure_indexes(self):
+        for collection in self.collections.values():
+            await collection.create_index(
+                [('bucket', 1), ('client_name', 1)], unique=True, name='bucket_client_name'
+            )
+
+    async def record(self, docs: list):
+        """
+        Count docs into every unit's buckets. Failures are logged, never
+        raised: stats must not break ingest
+        """
+        for unit, collection in self.collections.items():
+            counts = {}
+            for doc in docs:
+                bucket = (truncate_timestamp(doc['timestamp'], unit), doc['client_name'])
+                counts[bucket] = counts.get(bucket, 0) + 1
+            updates = [
+                UpdateOne({'bucket': bucket, 'client_name': client_name},
+                          {'$inc': {'count': count}}, upsert=True)
+                for (bucket, client_name), count in counts.items()
+            ]
+            try:
+                await collection.bulk_write(updates, ordered=False)
+            except PyMongoError as e:
+                self.failed += len(docs)
+                logger.warning(f"Could not update {unit} status rollups: {e}")
+        self.recorded += len(docs)
+
+    async def query(self, unit: str, client_name: Optional[str] = None,
+                    since: Optional[datetime] = None, until: Optional[datetime] = None) -> list:
+        query = {}
+        if client_name is not None:
+            query['client_name'] = client_name
+        if since is not None or until is not None:
+            window = {}
+            if since is not None:
+                window['$gte'] = since
+            if until is not None:
+                window['$lt'] = until
+            query['bucket'] = window
+        cursor = self.collections[unit].find(query, {'_id': 0}).sort([('bucket', 1), ('client_name', 1)])
+        return await cursor.to_list(None)
+
+
+class TimestampMigration:
+    """
+    Online conversion of legacy ISO string timestamps to BSON dates.
+
+    Walks the string-timestamped documents in _id order, `batch_size` at a
+    time with `pause` seconds between batches so it never competes with
+    live traffic. Each update is conditional on the string still being
+    there, so it is safe to run on several nodes at once. Unparseable
+    values are logged and left alone.
+    """
+
+    def __init__(self, collection, batch_size: int = 500, pause: float = 0.1):
+        self.collection = collection
+        self.batch_size = batch_size
+        self.pause = pause
+        self._task: Optional[asyncio.Task] = None
+        self.converted = 0
+        self.failed = 0
+        self.done = False
+        self.error: Optional[str] = None
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self):
+        try:
+            await self.migrate()
+        except Exception as e:
+            self.error = str(e)
+            logger.warning(f"Status timestamp migration stopped: {e}")
+
+    async def migrate(self):
+        last_id = None
+        while True:
+            query = {'timestamp': {'$type': 'string'}}
+            if last_id is not None:
+                query['_id'] = {'$gt': last_id}
+            docs = await self.collection.find(query, {'timestamp': 1}) \
+                .sort('_id', 1).limit(self.batch_size).to_list(self.batch_size)
+            if not docs:
+                break
+            last_id = docs[-1]['_id']
+            updates = []
+            for doc in docs:
+                try:
+                    timestamp = parse_timestamp(doc['timestamp'])
+                except ValueError:
+                    self.failed += 1
+                    logger.warning(f"Unparseable status timestamp {doc['timestamp']!r} in {doc['_id']}")
+                    continue
+                updates.append(UpdateOne(
+                    {'_id': doc['_id'], 'timestamp': doc['timestamp']},
+                    {'$set': {'timestamp': timestamp}},
+                ))
+            if updates:
+                result = await self.collection.bulk_write(updates, ordered=False)
+                self.converted += result.modified_count
+            await asyncio.sleep(self.pause)
+        self.done = True
+        if self.converted:
+            logger.info(f"Converted {self.converted} status timestamps to BSON dates")
+
+    def progress(self) -> dict:
+        return {
+            "done": self.done,
+            "converted": self.converted,
+            "failed": self.failed,
+            "error": self.error,
+        }
+
+
+STATUS_TTL_INDEX = 'timestamp_ttl'
+
+
+async def ensure_retention_index(db, collection, expire_after: Optional[float]):
+    """
+    TTL index deleting status checks expire_after seconds after their
+    timestamp. An existing index is retuned in place with collMod, and
+    dropped when retention is disabled (expire_after falsy)
+    """
+    current = (await collection.index_information()).get(STATUS_TTL_INDEX)
+    if not expire_after:
+        if current is not None:
+            await collection.drop_index(STATUS_TTL_INDEX)
+        return
+    seconds = int(expire_after)
+    if current is None:
+        await collection.create_index('timestamp', name=STATUS_TTL_INDEX, expireAfterSeconds=seconds)
+    elif current.get('expireAfterSeconds') != seconds:
+        await db.command('collMod', collection.name,
+                         index={'name': STATUS_TTL_INDEX, 'expireAfterSeconds': seconds})
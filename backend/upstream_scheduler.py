@@ -0,0 +1,142 @@
+"""
+Global rate limiting and prioritisation of upstream (YouTube) calls
+"""
+import asyncio
+import heapq
+import itertools
+import time
+from collections import deque
+from typing import Optional
+
+# Priority classes, most urgent first
+INTERACTIVE = 0
+PAGINATION = 1
+BACKGROUND = 2
+
+PRIORITY_NAMES = {INTERACTIVE: 'interactive', PAGINATION: 'pagination', BACKGROUND: 'background'}
+
+
+class UpstreamScheduler:
+    """
+    Token bucket plus concurrency cap in front of every upstream call.
+
+    A call needs a token (refilled at `rate` per second, at most `burst`
+    banked) and one of `max_concurrency` slots. Waiting calls are granted
+    strictly by priority class, FIFO within a class, so a backlog of
+    background refreshes never delays a user's search by more than the
+    calls already running. Used from the event loop only, so no locking.
+    """
+
+    def __init__(self, rate: float = 5.0, burst: int = 10, max_concurrency: int = 4,
+                 wait_window: int = 1024):
+        self.rate = rate
+        self.burst = burst
+        self.max_concurrency = max_concurrency
+        self._tokens = float(burst)
+        self._refilled_at = time.monotonic()
+        self._active = 0
+        self._waiters = []
+        self._seq = itertools.count()
+        self._timer = None
+        self.granted = {name: 0 for name in PRIORITY_NAMES.values()}
+        self.timeouts = {name: 0 for name in PRIORITY_NAMES.values()}
+        self._wait_total = {name: 0.0 for name in PRIORITY_NAMES.values()}
+        self._wait_max = {name: 0.0 for name in PRIORITY_NAMES.values()}
+        self._recent_waits = {name: deque(maxlen=wait_window) for name in PRIORITY_NAMES.values()}
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.burst, self._tokens + (now - self._refilled_at) * self.rate)
+        self._refilled_at = now
+
+    def _on_timer(self):
+        self._timer = None
+        self._dispatch()
+
+    def _dispatch(self):
+        self._refill()
+        while self._waiters and self._active < self.max_concurrency:
+            waiter = self._waiters[0][2]
+            if waiter.done():
+                # Timed out or cancelled while queued
+                heapq.heappop(self._waiters)
+                continue
+            if self._tokens < 1:
+                if self._timer is None:
+                    delay = (1 - self._tokens) / self.rate
+                    self._timer = asyncio.get_running_loop().call_later(delay, self._on_timer)
+                return
+            heapq.heappop(self._waiters)
+            self._tokens -= 1
+            self._active += 1
+            waiter.set_result(None)
+
+    async def acquire(self, priority: int = INTERACTIVE, timeout: Optional[float] = None):
+        """
+        Wait for a token and a slot. Raises TimeoutError if none is granted
+        within timeout seconds; every successful acquire needs a release()
+        """
+        name = PRIORITY_NAMES[priority]
+        started = time.monotonic()
+        waiter = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (priority, next(self._seq), waiter))
+        self._dispatch()
+        try:
+            if not waiter.done():
+                await asyncio.wait([waiter], timeout=timeout)
+        except asyncio.CancelledError:
+            if waiter.done():
+                self.release()
+            else:
+                waiter.cancel()
+            raise
+        if not waiter.done():
+            waiter.cancel()
+            self.timeouts[name] += 1
+            raise TimeoutError(f"No upstream slot for {name} search within {timeout:g}s")
+
+        waited = time.monotonic() - started
+        self.granted[name] += 1
+        self._wait_total[name] += waited
+        self._wait_max[name] = max(self._wait_max[name], waited)
+        self._recent_waits[name].append(waited)
+
+    def release(self):
+        self._active -= 1
+        self._dispatch()
+
+    async def call(self, priority: int, timeout: float, fn, *args, **kwargs):
+        """
+        Await fn(*args, **kwargs) once a token and a slot are granted
+        """
+        await self.acquire(priority, timeout)
+        try:
+            return await fn(*args, **kwargs)
+        finally:
+            self.release()
+
+    def stats(self) -> dict:
+        self._refill()
+        queued = {name: 0 for name in PRIORITY_NAMES.values()}
+        for priority, _, waiter in self._waiters:
+            if not waiter.done():
+                queued[PRIORITY_NAMES[priority]] += 1
+        wait = {}
+        for name, granted in self.granted.items():
+            recent = sorted(self._recent_waits[name])
+            wait[name] = {
+                "granted": granted,
+                "timeouts": self.timeouts[name],
+                "queued": queued[name],
+                "avg_ms": round(self._wait_total[name] / granted * 1000, 1) if granted else 0.0,
+                "p95_ms": round(recent[int(len(recent) * 0.95)] * 1000, 1) if recent else 0.0,
+                "max_ms": round(self._wait_max[name] * 1000, 1),
+            }
+        return {
+            "rate": self.rate,
+            "burst": self.burst,
+            "tokens": round(self._tokens, 2),
+            "max_concurrency": self.max_concurrency,
+            "active": self._active,
+            "queue_wait": wait,
+        }
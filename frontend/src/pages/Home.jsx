@@ -1,4 +1,4 @@
-import React, { useState, useEffect } from 'react';
+import React, { useState, useEffect, useRef } from 'react';
 import { Youtube, Loader2 } from 'lucide-react';
 import axios from 'axios';
 import SearchBar from '../components/SearchBar';
@@ -13,6 +13,13 @@ const Home = () => {
   const [currentVideoId, setCurrentVideoId] = useState('dQw4w9WgXcQ'); // Default video
   const [loading, setLoading] = useState(false);
   const [error, setError] = useState(null);
+  const [currentQuery, setCurrentQuery] = useState('');
+  const [nextPageToken, setNextPageToken] = useState(null);
+  const [loadingMore, setLoadingMore] = useState(false);
+  const loadingMoreRef = useRef(false);
+  // Aborted when a new search starts, so late responses for the previous
+  // query (its first page or a loadMore) are never applied
+  const searchControllerRef = useRef(null);
 
   // Load initial results
   useEffect(() => {
@@ -24,25 +31,88 @@ const Home = () => {
       return;
     }
 
+    searchControllerRef.current?.abort();
+    const controller = new AbortController();
+    searchControllerRef.current = controller;
+    loadingMoreRef.current = false;
+    setLoadingMore(false);
+
     setLoading(true);
     setError(null);
+    setCurrentQuery(query);
+    setNextPageToken(null);
 
     try {
       const response = await axios.get(`${API}/search/videos`, {
-        params: { q: query }
+        params: { q: query },
+        signal: controller.signal
       });
+      if (controller.signal.aborted) {
+        return;
+      }
 
       const results = response.data.items || [];
       setSearchResults(results);
+      setNextPageToken(response.data.nextPageToken || null);
       
       if (results.length > 0) {
         setCurrentVideoId(results[0].id);
       }
     } catch (err) {
+      if (axios.isCancel(err)) {
+        return;
+      }
       console.error('Search error:', err);
       setError('Failed to search videos. Please try again.');
     } finally {
-      setLoading(false);
+      if (searchControllerRef.current === controller) {
+        setLoading(false);
+      }
+    }
+  };
+
+  const loadMore = async () => {
+    if (!nextPageToken || loadingMoreRef.current) {
+      return;
+    }
+
+    const controller = searchControllerRef.current;
+    loadingMoreRef.current = true;
+    setLoadingMore(true);
+
+    try {
+      const response = await axios.get(`${API}/search/videos`, {
+        params: { q: currentQuery, page_token: nextPageToken },
+        signal: controller.signal
+      });
+      if (controller.signal.aborted) {
+        return;
+      }
+
+      const results = response.data.items || [];
+      setSearchResults((previous) => {
+        const seen = new Set(previous.map((video) => video.id));
+        return [...previous, ...results.filter((video) => !seen.has(video.id))];
+      });
+      setNextPageToken(response.data.nextPageToken || null);
+    } catch (err) {
+      if (!axios.isCancel(err)) {
+        console.error('Load more error:', err);
+      }
+    } finally {
+      // A newer search has already reset the loading state for itself
+      if (searchControllerRef.current === controller) {
+        loadingMoreRef.current = false;
+        setLoadingMore(false);
+      }
+    }
+  };
+
+  // Fetch the next page when the list is scrolled near its end
+  const handleListScroll = (event) => {
+    const { scrollTop, scrollHeight, clientHeight } = event.currentTarget;
+    if (scrollHeight - scrollTop - clientHeight < 200) {
+      loadMore();
     }
   };
 
@@ -73,10 +143,10 @@ const Home = () => {
           </div>
 
           {/* Video List - Scrollable */}
-          <div className="flex-1 overflow-y-auto bg-zinc-900 p-4">
+          <div className="flex-1 overflow-y-auto bg-zinc-900 p-4" onScroll={handleListScroll}>
             <div className="flex items-center justify-between mb-3">
               <h2 className="text-sm font-semibold text-gray-300">Search Results</h2>
-              {loading && (
+              {(loading || loadingMore) && (
                 <Loader2 className="w-4 h-4 text-gray-400 animate-spin" />
               )}
             </div>
@@ -0,0 +1,142 @@
+import asyncio
+
+import pytest
+
+import circuit_breaker
+from circuit_breaker import CircuitBreaker, CircuitOpenError
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(circuit_breaker.time, 'monotonic', clock.monotonic)
+    return clock
+
+
+async def ok():
+    return 'ok'
+
+
+async def fail():
+    raise ConnectionError('upstream down')
+
+
+def call(breaker, fn):
+    return asyncio.run(breaker.call(fn))
+
+
+def trip(breaker):
+    for _ in range(breaker.failure_threshold):
+        with pytest.raises(ConnectionError):
+            call(breaker, fail)
+
+
+def test_opens_after_consecutive_failures(clock):
+    breaker = CircuitBreaker(failure_threshold=3)
+    for _ in range(2):
+        with pytest.raises(ConnectionError):
+            call(breaker, fail)
+    assert breaker.state == CircuitBreaker.CLOSED
+    with pytest.raises(ConnectionError):
+        call(breaker, fail)
+    assert breaker.state == CircuitBreaker.OPEN
+
+
+def test_success_resets_the_failure_count(clock):
+    breaker = CircuitBreaker(failure_threshold=2)
+    with pytest.raises(ConnectionError):
+        call(breaker, fail)
+    assert call(breaker, ok) == 'ok'
+    with pytest.raises(ConnectionError):
+        call(breaker, fail)
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+def test_open_rejects_without_calling(clock):
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=30)
+    trip(breaker)
+    clock.now += 10
+    with pytest.raises(CircuitOpenError) as raised:
+        call(breaker, ok)
+    assert raised.value.retry_after == pytest.approx(20)
+    assert breaker.short_circuited == 1
+
+
+def test_half_open_probe_success_closes(clock):
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=30)
+    trip(breaker)
+    clock.now += 30
+    assert call(breaker, ok) == 'ok'
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+def test_half_open_probe_failure_reopens(clock):
+    breaker = CircuitBreaker(failure_threshold=3, reset_timeout=30)
+    trip(breaker)
+    clock.now += 30
+    with pytest.raises(ConnectionError):
+        call(breaker, fail)
+    assert breaker.state == CircuitBreaker.OPEN
+    assert breaker.times_opened == 2
+
+
+def test_half_open_admits_one_probe_at_a_time(clock):
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=30)
+    trip(breaker)
+    clock.now += 30
+    assert breaker.allow() is True
+    with pytest.raises(CircuitOpenError):
+        breaker.allow()
+    breaker.done(True)
+    assert breaker.allow() is True
+
+
+def test_slow_success_counts_as_failure(clock):
+    breaker = CircuitBreaker(failure_threshold=1, slow_call_threshold=5)
+
+    async def slow():
+        clock.now += 6
+        return 'late'
+
+    assert call(breaker, slow) == 'late'
+    assert breaker.slow_calls == 1
+    assert breaker.state == CircuitBreaker.OPEN
+
+
+def test_excluded_exceptions_do_not_count(clock):
+    breaker = CircuitBreaker(failure_threshold=1, excluded=(TypeError,))
+
+    async def unparseable():
+        raise TypeError('cannot parse this query')
+
+    for _ in range(3):
+        with pytest.raises(TypeError):
+            call(breaker, unparseable)
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert breaker.failures == 0
+
+
+def test_cancellation_is_neither_success_nor_failure(clock):
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=30)
+    trip(breaker)
+    clock.now += 30
+
+    async def main():
+        task = asyncio.ensure_future(breaker.call(asyncio.sleep, 10))
+        await asyncio.sleep(0)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    asyncio.run(main())
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    # The cancelled probe's slot was given back
+    assert breaker.allow() is True
@@ -0,0 +1,119 @@
+import time
+
+from search_cache import SearchCache, estimate_size
+
+# estimate_size('x' * 98) == 100, so a 300-byte cache holds three of these
+VALUE = 'x' * 98
+BIG = 'x' * 198
+
+
+def cache(max_bytes=300, **kwargs):
+    return SearchCache(max_bytes=max_bytes, **kwargs)
+
+
+def touch(c, key, times):
+    for _ in range(times):
+        c.lookup(key)
+
+
+def test_byte_budget():
+    assert estimate_size(VALUE) == 100
+    c = cache()
+    for key in 'abc':
+        touch(c, key, 1)
+        assert c.set(key, VALUE)
+    assert c.stats()['bytes'] == 300
+
+    # d is more popular than the LRU entry a, which makes room for it
+    touch(c, 'd', 3)
+    assert c.set('d', VALUE)
+    assert c.peek('a') is None
+    assert [key for key in 'bcd' if c.peek(key)] == ['b', 'c', 'd']
+    assert c.stats()['bytes'] == 300
+    assert c.evictions == 1
+
+
+def test_values_larger_than_the_budget_are_refused():
+    c = cache()
+    assert not c.set('a', 'x' * 400)
+    assert c.rejections == 1
+    assert len(c) == 0
+
+
+def test_one_off_keys_do_not_displace_popular_ones():
+    c = cache()
+    for key in 'abc':
+        touch(c, key, 5)
+        c.set(key, VALUE)
+    for i in range(20):
+        touch(c, f'once-{i}', 1)
+        assert not c.set(f'once-{i}', VALUE)
+    assert len(c) == 3
+    assert c.rejections == 20
+
+
+def test_lookup_refreshes_recency():
+    c = cache()
+    for key in 'abc':
+        touch(c, key, 1)
+        c.set(key, VALUE)
+    c.lookup('a')
+    touch(c, 'd', 3)
+    assert c.set('d', VALUE)
+    # b became the LRU entry once a was read
+    assert c.peek('a') is not None
+    assert c.peek('b') is None
+
+
+def test_refused_candidate_evicts_nothing():
+    c = cache()
+    touch(c, 'c', 1)
+    c.set('c', VALUE)
+    touch(c, 'a', 9)
+    c.set('a', VALUE)
+    touch(c, 'b', 1)
+    c.set('b', VALUE)
+
+    # d needs two slots: it beats c but not a, so neither may go
+    touch(c, 'd', 3)
+    assert not c.set('d', BIG)
+    assert [key for key in 'cab' if c.peek(key)] == ['c', 'a', 'b']
+    assert c.stats()['bytes'] == 300
+    assert c.evictions == 0
+
+
+def test_candidate_must_beat_every_victim():
+    c = cache()
+    for key, hits in (('c', 1), ('a', 2), ('b', 9)):
+        touch(c, key, hits)
+        c.set(key, VALUE)
+    touch(c, 'd', 5)
+    assert c.set('d', BIG)
+    assert c.peek('c') is None and c.peek('a') is None
+    assert c.peek('b') is not None and c.peek('d') is not None
+    assert c.evictions == 2
+
+
+def test_expired_entries_make_room_regardless_of_popularity():
+    c = cache(ttl=0.01)
+    for key in 'abc':
+        touch(c, key, 9)
+        c.set(key, VALUE)
+    time.sleep(0.02)
+    assert c.set('d', VALUE, ttl=60)
+    assert c.expirations == 1
+    assert c.stats()['bytes'] == 300
+
+
+def test_overwrite_reuses_the_entrys_own_bytes():
+    c = cache()
+    for key in 'abc':
+        touch(c, key, 9)
+        c.set(key, VALUE)
+    # Replacing a cached key is not an admission: it only needs room for
+    # the difference in size
+    assert c.set('b', 'y' * 98)
+    assert c.peek('b').value == 'y' * 98
+    assert len(c) == 3
+    assert c.stats()['bytes'] == 300
+    assert c.rejections == 0
@@ -0,0 +1,69 @@
+import pytest
+
+from bench_normalize import legacy_transform, make_records
+from search_normalize import ITEM_FIELDS, compile_fields, normalize_page, normalize_results, pick_thumbnail
+
+THUMBNAILS = [
+    {'url': 'small.jpg', 'width': 168},
+    {'url': 'medium.jpg', 'width': 360},
+    {'url': 'large.jpg', 'width': 720},
+]
+
+
+def test_matches_the_legacy_mapping():
+    records = make_records(50)
+    assert normalize_page(records) == legacy_transform(records)
+
+
+def test_fields_are_in_item_fields_order():
+    record = {'id': 'a', 'title': 't', 'channel': {'name': 'c'}, 'thumbnails': THUMBNAILS,
+              'descriptionSnippet': [{'text': 'd'}]}
+    item, = normalize_page([record])
+    assert list(item) == [name for name, _ in ITEM_FIELDS]
+    assert item == {'id': 'a', 'type': 'video', 'title': 't', 'channelTitle': 'c',
+                    'thumbnail': 'small.jpg', 'description': 'd'}
+
+
+@pytest.mark.parametrize('record', [
+    {},
+    {'id': None, 'title': None, 'channel': None, 'thumbnails': None, 'descriptionSnippet': None},
+    {'channel': 'not a dict', 'thumbnails': 'nope', 'descriptionSnippet': {'text': 'd'}},
+    {'channel': {}, 'thumbnails': [], 'descriptionSnippet': []},
+    {'channel': [1], 'thumbnails': [None], 'descriptionSnippet': [{'text': None}]},
+    {'channel': {'name': None}, 'thumbnails': [{'url': ''}], 'descriptionSnippet': ['text']},
+])
+def test_missing_or_malformed_values_become_empty(record):
+    item, = normalize_page([record])
+    assert item == {'id': '', 'type': 'video', 'title': '', 'channelTitle': '',
+                    'thumbnail': '', 'description': ''}
+
+
+def test_non_records_are_skipped():
+    assert normalize_page([None, 'x', 3, {'id': 'a'}]) == normalize_page([{'id': 'a'}])
+    assert normalize_page(None) == []
+
+
+@pytest.mark.parametrize('width, url', [
+    (None, 'small.jpg'),
+    (300, 'medium.jpg'),
+    (360, 'medium.jpg'),
+    (480, 'large.jpg'),
+    (1920, 'large.jpg'),
+])
+def test_thumbnail_width(width, url):
+    assert pick_thumbnail(THUMBNAILS, width) == url
+    item, = normalize_page([{'thumbnails': THUMBNAILS}], width)
+    assert item['thumbnail'] == url
+
+
+def test_normalize_results():
+    assert normalize_results({'result': [{'id': 'a'}]})[0]['id'] == 'a'
+    assert normalize_results(None) == []
+    assert normalize_results(['not', 'a', 'dict']) == []
+
+
+def test_paths_longer_than_three_steps_are_rejected(monkeypatch):
+    import search_normalize
+    monkeypatch.setattr(search_normalize, 'ITEM_FIELDS', (('deep', ('a', 'b', 'c', 'd')),))
+    with pytest.raises(ValueError):
+        compile_fields(None)
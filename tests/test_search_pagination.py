@@ -0,0 +1,58 @@
+import base64
+import json
+
+import pytest
+
+from search_cache import SearchKey
+from search_pagination import decode_page_token, encode_page_token
+
+
+def token(*fields) -> str:
+    raw = json.dumps(list(fields)).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def test_round_trip():
+    key = SearchKey('c# tutorial', 20, 'en-US')
+    assert decode_page_token(encode_page_token(key, 3)) == (key, 3)
+
+
+def test_tokens_are_deterministic():
+    key = SearchKey('gaming', 10, 'en-US')
+    assert encode_page_token(key, 2) == encode_page_token(SearchKey('gaming', 10, 'en-US'), 2)
+    assert encode_page_token(key, 2) != encode_page_token(key, 3)
+
+
+@pytest.mark.parametrize('page', [1, 0, -3])
+def test_page_one_and_below_are_rejected(page):
+    # Page one is only ever requested with q; a token for it could pair one
+    # query's key with another query's results
+    with pytest.raises(ValueError):
+        decode_page_token(encode_page_token(SearchKey('gaming', 10, 'en-US'), page))
+
+
+@pytest.mark.parametrize('limit', [0, -7, 51, 1000])
+def test_limits_outside_the_api_bounds_are_rejected(limit):
+    with pytest.raises(ValueError):
+        decode_page_token(token('gaming', limit, 'en-US', 2))
+
+
+@pytest.mark.parametrize('limit', [1, 50])
+def test_limit_bounds_are_inclusive(limit):
+    assert decode_page_token(token('gaming', limit, 'en-US', 2)) == (SearchKey('gaming', limit, 'en-US'), 2)
+
+
+@pytest.mark.parametrize('bad', [
+    '',
+    'not base64!',
+    token('gaming', 10, 'en-US'),
+    token('gaming', 10, 'en-US', 2, 'extra'),
+    token(7, 10, 'en-US', 2),
+    token('gaming', '10', 'en-US', 2),
+    token('gaming', 10, None, 2),
+    token('gaming', 10, 'en-US', 2.5),
+    base64.urlsafe_b64encode(b'{"q": "gaming"}').decode('ascii'),
+])
+def test_malformed_tokens_are_rejected(bad):
+    with pytest.raises(ValueError):
+        decode_page_token(bad)
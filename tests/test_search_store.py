@@ -0,0 +1,116 @@
+"""
+MongoSearchCache against a local mongod (MONGO_TEST_URL, e.g.
+mongodb://localhost:27017) or, without one, mongomock-motor
+"""
+import asyncio
+import os
+import uuid
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from pymongo.errors import DuplicateKeyError
+
+from search_cache import MongoSearchCache, SearchKey
+
+KEY = SearchKey('gaming', 10, 'en-US')
+ITEMS = [{'id': 'a1', 'title': 'First'}, {'id': 'b2', 'title': 'Second'}]
+
+
+def run(coro_fn):
+    """
+    Run coro_fn(collection) on a fresh collection, dropped afterwards
+    """
+    async def main():
+        url = os.environ.get('MONGO_TEST_URL')
+        if url:
+            from motor.motor_asyncio import AsyncIOMotorClient
+            client = AsyncIOMotorClient(url, tz_aware=True, tzinfo=timezone.utc,
+                                        serverSelectionTimeoutMS=2000)
+        else:
+            mongomock_motor = pytest.importorskip('mongomock_motor')
+            client = mongomock_motor.AsyncMongoMockClient(tz_aware=True)
+        db = client[f'test_search_store_{uuid.uuid4().hex[:8]}']
+        try:
+            return await coro_fn(db.search_cache)
+        finally:
+            await client.drop_database(db.name)
+            client.close()
+    return asyncio.run(main())
+
+
+def test_set_then_get_returns_items_and_timestamps():
+    async def check(collection):
+        store = MongoSearchCache(collection, ttl=60)
+        await store.set(KEY, ITEMS, delta=1.5)
+        doc = await store.get(KEY)
+        assert doc['items'] == ITEMS
+        assert doc['delta'] == 1.5
+        assert doc['created_at'].tzinfo is not None
+        assert timedelta(seconds=59) < doc['expires_at'] - doc['created_at'] <= timedelta(seconds=60)
+        assert (store.hits, store.misses, store.writes) == (1, 0, 1)
+    run(check)
+
+
+def test_get_misses_other_keys():
+    async def check(collection):
+        store = MongoSearchCache(collection)
+        await store.set(KEY, ITEMS)
+        assert await store.get(SearchKey('gaming', 20, 'en-US')) is None
+        assert await store.get(SearchKey('music', 10, 'en-US')) is None
+        assert store.misses == 2
+    run(check)
+
+
+def test_set_overwrites_the_entry():
+    async def check(collection):
+        store = MongoSearchCache(collection)
+        await store.set(KEY, ITEMS)
+        await store.set(KEY, ITEMS[:1])
+        assert (await store.get(KEY))['items'] == ITEMS[:1]
+        assert await collection.count_documents({}) == 1
+    run(check)
+
+
+def test_expired_entries_only_with_allow_expired():
+    async def check(collection):
+        store = MongoSearchCache(collection)
+        await store.set(KEY, ITEMS, ttl=-1)
+        assert await store.get(KEY) is None
+        doc = await store.get(KEY, allow_expired=True)
+        assert doc['items'] == ITEMS
+        assert doc['expires_at'] < datetime.now(timezone.utc)
+    run(check)
+
+
+def test_ensure_indexes():
+    async def check(collection):
+        store = MongoSearchCache(collection)
+        await store.ensure_indexes()
+        # Idempotent, as it runs on every startup
+        await store.ensure_indexes()
+        indexes = await collection.index_information()
+        assert indexes['query_limit_locale']['unique'] is True
+        assert indexes['query_limit_locale']['key'] == [('query', 1), ('limit', 1), ('locale', 1)]
+        assert indexes['expires_at_ttl']['expireAfterSeconds'] == 0
+
+        await store.set(KEY, ITEMS)
+        with pytest.raises(DuplicateKeyError):
+            await collection.insert_one({'query': KEY.query, 'limit': KEY.limit, 'locale': KEY.locale})
+    run(check)
+
+
+class FailingCollection:
+    async def find_one(self, *args, **kwargs):
+        raise ConnectionError("mongod unreachable")
+
+    async def update_one(self, *args, **kwargs):
+        await asyncio.sleep(1)
+
+
+def test_failures_and_slow_operations_are_misses():
+    async def check():
+        store = MongoSearchCache(FailingCollection(), timeout=0.05)
+        assert await store.get(KEY) is None
+        await store.set(KEY, ITEMS)
+        assert (store.errors, store.writes) == (2, 0)
+    asyncio.run(check())
@@ -0,0 +1,114 @@
+import asyncio
+
+from search_strategy import CLEANED, DIRECT, StrategyEngine, clean_query
+
+
+def attempt(result, delay=0.0, error=None, started=None, name=None):
+    async def run():
+        if started is not None:
+            started.append(name)
+        await asyncio.sleep(delay)
+        if error is not None:
+            raise error
+        return result
+    return run
+
+
+def test_direct_answer_wins_without_hedging():
+    async def main():
+        engine = StrategyEngine(hedge_delay=0.5)
+        started = []
+        result = await engine.run('q', [
+            (DIRECT, attempt(['a'], 0.01, started=started, name=DIRECT)),
+            (CLEANED, attempt(['b'], started=started, name=CLEANED)),
+        ])
+        assert result == (['a'], DIRECT)
+        assert started == [DIRECT]
+        assert engine.hedged == 0
+    asyncio.run(main())
+
+
+def test_slow_direct_is_hedged_and_loser_cancelled():
+    async def main():
+        engine = StrategyEngine(hedge_delay=0.02)
+        cancelled = asyncio.Event()
+
+        async def slow_direct():
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                cancelled.set()
+                raise
+
+        result = await engine.run('q', [(DIRECT, slow_direct), (CLEANED, attempt(['b']))])
+        assert result == (['b'], CLEANED)
+        assert engine.hedged == 1
+        await asyncio.wait_for(cancelled.wait(), 1)
+    asyncio.run(main())
+
+
+def test_failure_launches_next_strategy_immediately():
+    async def main():
+        engine = StrategyEngine(hedge_delay=10)
+        result = await asyncio.wait_for(engine.run('q', [
+            (DIRECT, attempt(None, error=TypeError('parse'))),
+            (CLEANED, attempt(['b'])),
+        ]), 1)
+        assert result == (['b'], CLEANED)
+        assert engine.hedged == 0
+    asyncio.run(main())
+
+
+def test_unacceptable_answers_fall_through():
+    async def main():
+        engine = StrategyEngine(hedge_delay=10)
+        assert await engine.run('q', [(DIRECT, attempt([])), (CLEANED, attempt(['b']))]) == (['b'], CLEANED)
+        # Nothing acceptable: the first answer is returned
+        assert await engine.run('r', [(DIRECT, attempt([])), (CLEANED, attempt([], 0.01))]) == ([], DIRECT)
+        assert engine.unanswered == 1
+    asyncio.run(main())
+
+
+def test_all_failures_raise_the_first_error():
+    async def main():
+        engine = StrategyEngine(hedge_delay=10)
+        try:
+            await engine.run('q', [
+                (DIRECT, attempt(None, error=TypeError('first'))),
+                (CLEANED, attempt(None, error=AttributeError('second'))),
+            ])
+        except TypeError as e:
+            assert str(e) == 'first'
+        else:
+            raise AssertionError('expected TypeError')
+    asyncio.run(main())
+
+
+def test_remembered_winner_is_launched_first():
+    async def main():
+        engine = StrategyEngine(hedge_delay=10)
+        await engine.run('q', [(DIRECT, attempt(None, error=TypeError('parse'))), (CLEANED, attempt(['b']))])
+        assert engine.winner_for('q') == CLEANED
+
+        started = []
+        result = await engine.run('q', [
+            (DIRECT, attempt(['a'], started=started, name=DIRECT)),
+            (CLEANED, attempt(['b'], started=started, name=CLEANED)),
+        ])
+        assert result == (['b'], CLEANED)
+        assert started == [CLEANED]
+        assert engine.reordered == 1
+    asyncio.run(main())
+
+
+def test_memory_is_bounded():
+    engine = StrategyEngine(memory_size=2)
+    for query in ('a', 'b', 'c'):
+        engine.remember(query, CLEANED)
+    assert engine.winner_for('a') is None
+    assert engine.winner_for('c') == CLEANED
+
+
+def test_clean_query():
+    assert clean_query('c# tutorial!!') == 'c tutorial'
+    assert len(clean_query('x' * 80)) == 50
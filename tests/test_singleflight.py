@@ -0,0 +1,84 @@
+import asyncio
+
+import pytest
+
+from singleflight import SingleFlight
+
+
+def test_followers_share_the_leaders_result():
+    async def main():
+        flights = SingleFlight()
+        calls = 0
+
+        async def fetch(value):
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.01)
+            return value
+
+        results = await asyncio.gather(*(flights.do('k', fetch, 42) for _ in range(5)))
+        assert results == [42] * 5
+        assert calls == 1
+        assert (flights.leaders, flights.followers) == (1, 4)
+        assert 'k' not in flights
+    asyncio.run(main())
+
+
+def test_cancelled_leader_does_not_cancel_followers():
+    async def main():
+        flights = SingleFlight()
+        release = asyncio.Event()
+
+        async def fetch():
+            await release.wait()
+            return 'done'
+
+        leader = asyncio.ensure_future(flights.do('k', fetch))
+        await asyncio.sleep(0)
+        followers = [asyncio.ensure_future(flights.do('k', fetch)) for _ in range(3)]
+        await asyncio.sleep(0)
+
+        leader.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+        release.set()
+        assert await asyncio.gather(*followers) == ['done'] * 3
+        assert 'k' not in flights
+    asyncio.run(main())
+
+
+def test_exception_reaches_every_caller_and_is_not_memoized():
+    async def main():
+        flights = SingleFlight()
+        calls = 0
+
+        async def fetch():
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.01)
+            if calls == 1:
+                raise ValueError('upstream broke')
+            return 'recovered'
+
+        results = await asyncio.gather(*(flights.do('k', fetch) for _ in range(4)),
+                                       return_exceptions=True)
+        assert len(results) == 4
+        assert all(isinstance(result, ValueError) for result in results)
+        assert 'k' not in flights
+
+        assert await flights.do('k', fetch) == 'recovered'
+        assert calls == 2
+    asyncio.run(main())
+
+
+def test_keys_are_independent():
+    async def main():
+        flights = SingleFlight()
+
+        async def fetch(value):
+            await asyncio.sleep(0.01)
+            return value
+
+        assert await asyncio.gather(flights.do('a', fetch, 1), flights.do('b', fetch, 2)) == [1, 2]
+        assert flights.leaders == 2
+    asyncio.run(main())